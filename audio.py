@@ -1,10 +1,26 @@
+import time
+import logging
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import pyaudio
 import numpy as np
-import scipy.signal
 import discord
+from dsp import DSPChain
+from effects import Chorus, Flanger, Vibrato, Tremolo
+from mixer import AuxSource, Ducker
+from meters import MeterSnapshot
+from governor import QualityGovernor
+
+log = logging.getLogger("booster.audio")
+
 
 class AudioHandler(discord.AudioSource):
     def __init__(self):
+        # Every blocking PyAudio/device call made on behalf of the event loop
+        # goes through this single worker, which also serializes device access.
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-io")
         self.p = pyaudio.PyAudio()
         self.gain = 1.0
         self.pitch_factor = 1.0 # 1.0 = normal, 0.5 = deep, 2.0 = chipmunk
@@ -13,78 +29,226 @@ class AudioHandler(discord.AudioSource):
         self.eq_low_db = 0.0
         self.eq_mid_db = 0.0
         self.eq_high_db = 0.0
+
+        # Modulation effects (all disabled by default)
+        self.chorus = Chorus()
+        self.flanger = Flanger()
+        self.vibrato = Vibrato()
+        self.tremolo = Tremolo()
+        self.modulation_chain = [self.vibrato, self.chorus, self.flanger, self.tremolo]
         
         self.stream = None
+
+        # Device hot-swap: a new stream is opened and warmed up by the caller,
+        # then handed to the audio thread, which crossfades at the next frame.
+        self._stream_lock = threading.Lock()
+        self._pending_stream = None
+        self._last_read_time = float("-inf")
+        self.input_gap = True # no frame was read in the last 100ms
+        self.WARMUP_FRAMES = 2
+
+        # Warm pipeline: while the voice player is not pulling frames (reconnecting),
+        # a background thread keeps capture and DSP running and discards the output.
+        self.last_player_read = 0.0
+        self._warm_thread = None
+        self._warm_stop = None
+        # One frame at a time: DSP/effect/meter state is not thread-safe
+        self._render_lock = threading.Lock()
+
+        # Secondary input (music / loopback), mixed after the mic effect chain
+        self.aux = None
+        self.aux_gain = 1.0
+        self.ducker = Ducker()
+
         self.CHUNK = 960 # 20ms at 48kHz
         self.FORMAT = pyaudio.paInt16
         self.CHANNELS = 2
         self.RATE = 48000
         self.frames_count = 0
         
-        self.sos_cache = None
-        self.start_stream()
-
-    def _design_low_shelf(self, cutoff, gain_db, fs=48000, Q=0.707):
-        A = 10**(gain_db/40.0)
-        w0 = 2 * np.pi * cutoff / fs
-        alpha = np.sin(w0) / (2 * Q)
-        cos_w0 = np.cos(w0)
-        
-        b0 =    A * ((A+1) - (A-1)*cos_w0 + 2*np.sqrt(A)*alpha)
-        b1 =  2*A * ((A-1) - (A+1)*cos_w0)
-        b2 =    A * ((A+1) - (A-1)*cos_w0 - 2*np.sqrt(A)*alpha)
-        a0 =        (A+1) + (A-1)*cos_w0 + 2*np.sqrt(A)*alpha
-        a1 =   -2 * ((A-1) + (A+1)*cos_w0)
-        a2 =        (A+1) + (A-1)*cos_w0 - 2*np.sqrt(A)*alpha
-        
-        return np.array([b0, b1, b2, a0, a1, a2]) / a0
-
-    def _design_high_shelf(self, cutoff, gain_db, fs=48000, Q=0.707):
-        A = 10**(gain_db/40.0)
-        w0 = 2 * np.pi * cutoff / fs
-        alpha = np.sin(w0) / (2 * Q)
-        cos_w0 = np.cos(w0)
-
-        b0 =    A * ((A+1) + (A-1)*cos_w0 + 2*np.sqrt(A)*alpha)
-        b1 = -2*A * ((A-1) + (A+1)*cos_w0)
-        b2 =    A * ((A+1) + (A-1)*cos_w0 - 2*np.sqrt(A)*alpha)
-        a0 =        (A+1) - (A-1)*cos_w0 + 2*np.sqrt(A)*alpha
-        a1 =    2 * ((A-1) - (A+1)*cos_w0)
-        a2 =        (A+1) - (A-1)*cos_w0 - 2*np.sqrt(A)*alpha
-
-        return np.array([b0, b1, b2, a0, a1, a2]) / a0
-
-    def _design_peaking(self, cutoff, gain_db, fs=48000, Q=1.0):
-        A = 10**(gain_db/40.0)
-        w0 = 2 * np.pi * cutoff / fs
-        alpha = np.sin(w0) / (2 * Q)
-        cos_w0 = np.cos(w0)
-
-        b0 =   1 + alpha*A
-        b1 =  -2*cos_w0
-        b2 =   1 - alpha*A
-        a0 =   1 + alpha/A
-        a1 =  -2*cos_w0
-        a2 =   1 - alpha/A
-
-        return np.array([b0, b1, b2, a0, a1, a2]) / a0
+        # Compiled pitch/EQ/gain chain. Setters build a new chain on their own
+        # thread and publish it in target_chain; the audio thread crossfades
+        # from self.chain to it at the next frame boundary.
+        # pending_modulation: effect settings of a preset the audio thread has
+        # not switched to yet (carried by every chain compiled meanwhile).
+        self.pending_modulation = None
+        self.chain = self._compile_chain()
+        self.target_chain = self.chain
+
+        # Per-frame level/spectrum summary for the GUI meters
+        self.meters = MeterSnapshot(chunk=self.CHUNK, channels=self.CHANNELS, rate=self.RATE)
+
+        # CPU overload governor: per-frame processing time picks the chain variant
+        self.governor = QualityGovernor()
+        self.quality = 0
+        # No input stream yet: the owner opens the default device with
+        # run_blocking(start_stream); read() returns silence until then
+
+    def _open_input_stream(self, device_index):
+        return self.p.open(format=self.FORMAT,
+                           channels=self.CHANNELS,
+                           rate=self.RATE,
+                           input=True,
+                           input_device_index=device_index,
+                           frames_per_buffer=self.CHUNK) # No large buffer
+
+    def _close_stream(self, stream):
+        try:
+            stream.stop_stream()
+            stream.close()
+        except Exception as e:
+            log.warning("failed to close stream: %s", e)
+
+    def _close_stream_in_background(self, stream):
+        # Closing can block for a buffer period or more; keep it off the audio thread
+        try:
+            self.executor.submit(self._close_stream, stream)
+        except RuntimeError:
+            # Executor already shut down (exiting)
+            self._close_stream(stream)
+
+    def run_blocking(self, fn, *args, **kwargs):
+        """Run a blocking audio/device call on the audio executor; returns an awaitable."""
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
 
     def start_stream(self, device_index=None):
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        """
+        Switch input device without a gap. Blocking: call it through run_blocking().
+        The new stream is opened and warmed up here (caller's thread); the audio
+        thread swaps to it at the next frame boundary with a one-frame crossfade.
+        If opening fails the current device keeps running and the error is raised.
+        """
+        log.debug("opening audio stream", extra={'device': device_index})
+        t0 = time.perf_counter()
+        try:
+            new_stream = self._open_input_stream(device_index)
+        except Exception as e:
+            log.error("failed to open stream: %s", e, extra={'device': device_index})
+            raise
 
-        print(f"DEBUG: Opening audio stream (Device: {device_index})")
         try:
-            self.stream = self.p.open(format=self.FORMAT,
-                                      channels=self.CHANNELS,
-                                      rate=self.RATE,
-                                      input=True,
-                                      input_device_index=device_index,
-                                      frames_per_buffer=self.CHUNK) # No large buffer
-            print("DEBUG: Audio stream opened.")
+            # Warm-up: make sure the device is actually delivering audio
+            for _ in range(self.WARMUP_FRAMES):
+                new_stream.read(self.CHUNK, exception_on_overflow=False)
         except Exception as e:
-            print(f"ERROR: Failed to open stream: {e}")
+            log.error("stream warm-up failed: %s", e, extra={'device': device_index})
+            self._close_stream_in_background(new_stream)
+            raise
+
+        with self._stream_lock:
+            replaced = self._pending_stream
+            self._pending_stream = None
+
+            # Nobody is pulling frames (not playing yet): swap immediately
+            idle = time.monotonic() - self._last_read_time > 0.1
+            deferred = not (self.stream is None or idle)
+            if deferred:
+                old_stream = None
+                self._pending_stream = new_stream
+            else:
+                old_stream = self.stream
+                self.stream = new_stream
+
+        for stream in (replaced, old_stream):
+            if stream:
+                self._close_stream_in_background(stream)
+        log.info("audio stream opened", extra={'device': device_index,
+                                               'open_ms': (time.perf_counter() - t0) * 1000,
+                                               'swap': 'crossfade' if deferred else 'immediate'})
+
+    def _crossfade_to(self, new_stream):
+        """Audio thread: read one frame from both streams, fade old -> new, swap."""
+        old_stream = self.stream
+        self.stream = new_stream
+
+        # Drop whatever the new stream buffered while waiting for this frame
+        try:
+            backlog = new_stream.get_read_available() - self.CHUNK
+            if backlog > 0:
+                new_stream.read(backlog, exception_on_overflow=False)
+        except Exception:
+            pass
+
+        old_data = None
+        try:
+            if old_stream is not None and old_stream.is_active():
+                old_data = np.frombuffer(old_stream.read(self.CHUNK, exception_on_overflow=False),
+                                         dtype=np.int16).astype(np.float32)
+        except Exception:
+            pass
+        if old_stream is not None:
+            self._close_stream_in_background(old_stream)
+
+        new_data = np.frombuffer(new_stream.read(self.CHUNK, exception_on_overflow=False),
+                                 dtype=np.int16).astype(np.float32)
+
+        log.debug("switched input stream", extra={'frame': self.frames_count,
+                                                  'crossfade': old_data is not None})
+        if old_data is None or old_data.shape != new_data.shape:
+            return new_data
+
+        return self._crossfade(old_data, new_data)
+
+    def _crossfade(self, old_data, new_data):
+        """Linear fade from one interleaved frame to another over the frame."""
+        ramp = np.repeat(np.linspace(0.0, 1.0, self.CHUNK, dtype=np.float32), self.CHANNELS)
+        return old_data * (1.0 - ramp) + new_data * ramp
+
+    def _read_input(self):
+        """One frame of mic input as float32 (interleaved), or None for silence."""
+        with self._stream_lock:
+            now = time.monotonic()
+            stale = now - self._last_read_time > 0.1
+            self._last_read_time = now
+            self.input_gap = stale
+
+            pending = self._pending_stream
+            if pending is not None:
+                self._pending_stream = None
+                try:
+                    return self._crossfade_to(pending)
+                except IOError:
+                    return None
+
+            if self.stream is None or not self.stream.is_active():
+                return None
+
+            # Nobody read for a while: drop the backlog so this frame is current audio
+            if stale:
+                try:
+                    backlog = self.stream.get_read_available() - self.CHUNK
+                    if backlog > 0:
+                        self.stream.read(backlog, exception_on_overflow=False)
+                except Exception:
+                    pass
+
+            # Always read exactly CHUNK size (maintain real-time sync)
+            try:
+                data = self.stream.read(self.CHUNK, exception_on_overflow=False)
+            except IOError:
+                # Buffer overflow/underflow, return silence to catch up
+                return None
+
+        return np.frombuffer(data, dtype=np.int16).astype(np.float32)
+
+    def start_aux_stream(self, device_index=None):
+        """Open (or replace) the secondary input. device_index=None closes it."""
+        self.stop_aux_stream()
+        if device_index is None:
+            return
+
+        log.debug("opening secondary stream", extra={'device': device_index})
+        aux = AuxSource(self.p, device_index,
+                        rate=self.RATE, channels=self.CHANNELS, chunk=self.CHUNK)
+        self.aux = aux
+        log.info("secondary stream opened", extra={'device': device_index})
+
+    def stop_aux_stream(self):
+        aux = self.aux
+        self.aux = None
+        if aux:
+            aux.close()
 
     def get_input_devices(self):
         devices = []
@@ -99,118 +263,230 @@ class AudioHandler(discord.AudioSource):
             pass
         return devices
 
+    def _compile_chain(self, modulation=None):
+        if modulation is None:
+            modulation = self.pending_modulation
+        return DSPChain(gain=self.gain, pitch_factor=self.pitch_factor,
+                        eq_db=(self.eq_low_db, self.eq_mid_db, self.eq_high_db),
+                        chunk=self.CHUNK, channels=self.CHANNELS, rate=self.RATE,
+                        modulation=modulation)
+
     def set_gain(self, gain):
         self.gain = max(0.0, float(gain))
+        self.target_chain = self._compile_chain()
 
     def set_pitch(self, factor):
         self.pitch_factor = max(0.1, min(4.0, float(factor)))
+        self.target_chain = self._compile_chain()
 
     def set_eq(self, low, mid, high):
         self.eq_low_db = low
         self.eq_mid_db = mid
         self.eq_high_db = high
+        self.target_chain = self._compile_chain()
 
-    def _shift_pitch_fft(self, audio_chunk, factor):
+    def apply_chain(self, chain):
         """
-        Naive pitch shift using FFT scaling.
-        Produces robotic/alien artifacts but maintains strict 1:1 timing (zero latency drift).
+        Switch to a precompiled chain (see presets.py) at the next frame boundary.
+        Its modulation settings, if any, are applied on the audio thread at the same frame.
         """
-        # Stereo Handling: Process as mono temporarily or interleaved?
-        # FFT is easier on mono or separate channels. Interleaved is messy.
-        # Let's reshape to (N_samples, Channels)
-        shape = audio_chunk.shape
-        audio_chunk = audio_chunk.reshape(-1, self.CHANNELS)
-        
-        # Windowing to reduce click artifacts at boundaries
-        n_samples = audio_chunk.shape[0]
-        # window = np.hanning(n_samples)[:, np.newaxis] # simple window
-        
-        # FFT (Real)
-        # axis=0 is time
-        freq_domain = np.fft.rfft(audio_chunk, axis=0)
-        
-        # Scaling indices
-        n_freqs = freq_domain.shape[0]
-        indices = np.arange(n_freqs)
-        # If pitch > 1.0 (higher), we want lower freqs to move to higher indices.
-        # target_index = src_index / factor
-        # e.g. factor 2.0: index 10 comes from index 5? No.
-        # Shift UP: F_new = F_old * factor.
-        # Index_new = Index_old * factor.
-        # content at Index_new comes from Index_new / factor.
-        
-        # Interpolation source indices
-        new_indices = indices / factor
-        
-        # Clip indices to valid range
-        new_indices = np.clip(new_indices, 0, n_freqs - 1)
-        
-        # Interpolate Magnitude and Phase separately?
-        # For robot voice, magnitude is key. Phase randomization adds robot feel.
-        # Naive complex interpolation:
-        # We need to interpolate Real and Imag separately
-        
-        shifted_real = np.zeros_like(freq_domain.real)
-        shifted_imag = np.zeros_like(freq_domain.imag)
-        
-        for ch in range(self.CHANNELS):
-             shifted_real[:, ch] = np.interp(new_indices, indices, freq_domain[:, ch].real)
-             shifted_imag[:, ch] = np.interp(new_indices, indices, freq_domain[:, ch].imag)
-        
-        shifted_freq_domain = shifted_real + 1j * shifted_imag
-        
-        # IFFT
-        shifted_time = np.fft.irfft(shifted_freq_domain, n=n_samples, axis=0)
-        
-        return shifted_time.flatten().astype(np.float32)
+        self.gain = chain.gain
+        self.pitch_factor = chain.pitch_factor
+        self.eq_low_db, self.eq_mid_db, self.eq_high_db = chain.eq_db
+        if chain.modulation is not None:
+            self.pending_modulation = chain.modulation
+        self.target_chain = chain
 
-    def read(self):
-        try:
-            if self.stream is None or not self.stream.is_active():
-                 return b'\x00' * self.CHUNK * 4
+    def get_settings(self):
+        """Current chain settings as a plain dict (the preset format)."""
+        modulation = {
+            name: {'enabled': fx.enabled, 'rate': fx.rate, 'depth': fx.depth, 'mix': fx.mix}
+            for name, fx in self.modulation_effects().items()
+        }
+        pending = self.pending_modulation
+        if pending is not None:
+            # A preset is applied but its effects are not switched yet
+            for name, params in pending.items():
+                modulation[name].update({key: value if key == 'enabled' else self._clamp_param(key, value)
+                                         for key, value in params.items()})
+        return {
+            'gain_db': round(20 * np.log10(max(self.gain, 1e-10)), 2),
+            'pitch': self.pitch_factor,
+            'eq': [self.eq_low_db, self.eq_mid_db, self.eq_high_db],
+            'modulation': modulation,
+        }
 
-            # Always read exactly CHUNK size (maintain real-time sync)
-            try:
-                data = self.stream.read(self.CHUNK, exception_on_overflow=False)
-            except IOError:
-                # Buffer overflow/underflow, return silence to catch up
-                return b'\x00' * self.CHUNK * 4
-            
-            audio_data = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    def modulation_effects(self):
+        return {'chorus': self.chorus, 'flanger': self.flanger,
+                'vibrato': self.vibrato, 'tremolo': self.tremolo}
 
-            # 1. Pitch Shift (FFT-based, Zero Latency)
-            if self.pitch_factor != 1.0:
-                 audio_data = self._shift_pitch_fft(audio_data, self.pitch_factor)
+    def set_aux_gain(self, gain):
+        self.aux_gain = max(0.0, float(gain))
 
-            # 2. Apply EQ
-            if abs(self.eq_low_db) > 0.1:
-                coeffs = self._design_low_shelf(100, self.eq_low_db)
-                audio_data = scipy.signal.lfilter(coeffs[:3], coeffs[3:], audio_data)
+    def set_ducking(self, enabled, depth_db=None, threshold_db=None):
+        self.ducker.enabled = bool(enabled)
+        if depth_db is not None:
+            self.ducker.depth_db = min(0.0, float(depth_db))
+        if threshold_db is not None:
+            self.ducker.threshold_db = float(threshold_db)
 
-            if abs(self.eq_mid_db) > 0.1:
-                coeffs = self._design_peaking(1000, self.eq_mid_db)
-                audio_data = scipy.signal.lfilter(coeffs[:3], coeffs[3:], audio_data)
+    def set_governor(self, enabled, budget_ms=None):
+        """Enable/disable automatic quality reduction; budget_ms is per 20ms frame."""
+        self.governor.enabled = bool(enabled)
+        if budget_ms is not None:
+            self.governor.set_budget(budget_ms)
 
-            if abs(self.eq_high_db) > 0.1:
-                coeffs = self._design_high_shelf(8000, self.eq_high_db)
-                audio_data = scipy.signal.lfilter(coeffs[:3], coeffs[3:], audio_data)
+    def _apply_modulation(self, modulation):
+        # Audio thread, when a chain carrying effect settings takes over
+        for name, params in modulation.items():
+            params = dict(params)
+            self.set_modulation(name, params.pop('enabled', False), **params)
+        if self.pending_modulation is modulation:
+            self.pending_modulation = None
 
-            # 3. Apply Gain
-            if self.gain != 1.0:
-                audio_data = audio_data * self.gain
+    @staticmethod
+    def _clamp_param(key, value):
+        if key == 'rate':
+            return max(0.01, min(20.0, float(value)))
+        return max(0.0, min(1.0, float(value)))
 
-            # 4. Clip
+    def set_modulation(self, name, enabled, **params):
+        """
+        name: 'chorus', 'flanger', 'vibrato' or 'tremolo'.
+        params: any of rate (Hz), depth (0..1), mix (0..1), spread (0..1).
+        """
+        effect = getattr(self, name)
+        for key, value in params.items():
+            setattr(effect, key, self._clamp_param(key, value))
+        # The audio thread fades the effect in or out over the next block (ModulationEffect.run)
+        effect.enabled = bool(enabled)
+
+    def keep_warm(self, enabled):
+        """
+        Keep capture and DSP state running while no voice player is reading.
+        Blocking (joins the warm thread): call it through run_blocking().
+        """
+        if enabled and self._warm_thread is None:
+            self._warm_stop = threading.Event()
+            self._warm_thread = threading.Thread(target=self._warm_loop, args=(self._warm_stop,),
+                                                 name="audio-warm", daemon=True)
+            self._warm_thread.start()
+        elif not enabled and self._warm_thread is not None:
+            self._warm_stop.set()
+            self._warm_thread.join()
+            self._warm_thread = None
+
+    def _warm_loop(self, stop):
+        frame_time = self.CHUNK / self.RATE
+        while not stop.is_set():
+            start = time.monotonic()
+            # Only step in when the player has been idle for a couple of frames;
+            # never wait for the lock, the player always has priority
+            if start - self.last_player_read > 2 * frame_time and self._render_lock.acquire(blocking=False):
+                try:
+                    # read() stamps last_player_read before taking the lock
+                    if time.monotonic() - self.last_player_read > 2 * frame_time:
+                        self._render_frame()
+                finally:
+                    self._render_lock.release()
+            stop.wait(max(0.0, frame_time - (time.monotonic() - start)))
+
+    def read(self):
+        # Called by discord's AudioPlayer thread every 20ms
+        self.last_player_read = time.monotonic()
+        with self._render_lock:
+            return self._render_frame()
+
+    def _run_modulation(self, audio_data):
+        """Modulation effects on one frame; disabled ones only keep their delay history fed."""
+        block = audio_data.reshape(-1, self.CHANNELS)
+        for fx in self.modulation_chain:
+            block = fx.run(block)
+        return block.reshape(-1)
+
+    def _render_frame(self):
+        try:
+            audio_data = self._read_input()
+            aux = self.aux
+            if audio_data is None:
+                if aux is None:
+                    return b'\x00' * self.CHUNK * 4
+                # No mic frame: keep the secondary input playing (and its ring draining)
+                audio_data = np.zeros(self.CHUNK * self.CHANNELS, dtype=np.float32)
+            self.frames_count += 1
+            mic_raw = audio_data
+            # Processing time only: the input read above blocks until the device has a frame
+            t0 = time.perf_counter()
+            quality = self.quality
+
+            # 1-3. Pitch, EQ, Gain (precompiled chain, variant picked by the governor),
+            # 4. then modulation (chorus/flanger/vibrato/tremolo), block-rate
+            target = self.target_chain
+            if self.input_gap:
+                # Nothing audible to fade from
+                if target is not self.chain:
+                    self.chain = target
+                    if target.modulation is not None:
+                        self._apply_modulation(target.modulation)
+                for fx in self.modulation_chain:
+                    fx.settle()
+            if target is self.chain:
+                audio_data = self._run_modulation(self.chain.variant(quality).process(audio_data))
+            elif target.modulation is None:
+                # Settings changed: run old and new chain on this frame and crossfade
+                old_out = self.chain.variant(quality).process(audio_data)
+                new_out = target.variant(quality).process(audio_data)
+                self.chain = target
+                audio_data = self._run_modulation(self._crossfade(old_out, new_out))
+            else:
+                # A preset also changes the effects: render this frame with the old
+                # chain and effects, then from the same effect state with the new
+                # ones, and crossfade
+                states = [fx.save_state() for fx in self.modulation_chain]
+                old_out = self._run_modulation(self.chain.variant(quality).process(audio_data))
+                for fx, state in zip(self.modulation_chain, states):
+                    fx.restore_state(state)
+                self._apply_modulation(target.modulation)
+                for fx in self.modulation_chain:
+                    fx.settle()
+                new_out = self._run_modulation(target.variant(quality).process(audio_data))
+                self.chain = target
+                audio_data = self._crossfade(old_out, new_out)
+
+            # 5. Mix secondary input (ducked while the mic is active)
+            if aux is not None:
+                aux_block = aux.pull() * self.aux_gain
+                aux_block = self.ducker.process(mic_raw.reshape(-1, self.CHANNELS), aux_block)
+                audio_data = audio_data + aux_block.reshape(-1)
+
+            # 6. Publish meter snapshot (pre-clip, so clipping is visible), then clip
+            self.meters.publish(mic_raw, audio_data)
             audio_data = np.clip(audio_data, -32768, 32767)
-            return audio_data.astype(np.int16).tobytes()
+            out = audio_data.astype(np.int16).tobytes()
+            self.quality = self.governor.record(time.perf_counter() - t0)
+            return out
 
         except Exception as e:
-            # print(f"Audio Error: {e}")
+            log.warning("frame processing failed: %s", e, extra={'frame': self.frames_count})
             return b'\x00' * self.CHUNK * 4
 
     def cleanup(self):
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        # discord.py calls this whenever a player stops (leave, disconnect,
+        # reconnect). The handler outlives its players, so nothing is released
+        # here; the owner calls close() once at exit.
+        pass
+
+    def close(self):
+        """Stop all streams and release PortAudio. Blocking: call it through run_blocking()."""
+        self.keep_warm(False)
+        self.stop_aux_stream()
+        with self._stream_lock:
+            streams = (self._pending_stream, self.stream)
+            self._pending_stream = None
+            self.stream = None
+        for stream in streams:
+            if stream:
+                self._close_stream(stream)
         self.p.terminate()
 
     def is_opus(self):
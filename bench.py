@@ -0,0 +1,148 @@
+"""
+Micro-benchmarks for the audio path.
+
+Every stage is timed on 20ms frames (960 stereo samples at 48kHz) and
+reported as microseconds per frame and as a share of the 20ms frame budget
+on one core. Run with: python bench.py
+"""
+import sys
+import time
+import numpy as np
+
+from effects import Chorus, Flanger, Vibrato, Tremolo
+from mixer import RingBuffer, Ducker
+from meters import MeterSnapshot
+from dsp import DSPChain
+from governor import LEVEL_NAMES
+
+CHUNK = 960
+CHANNELS = 2
+RATE = 48000
+FRAME_BUDGET_US = CHUNK / RATE * 1e6  # 20000 us
+
+
+def make_frames(n_frames=200, seed=0):
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal((n_frames, CHUNK, CHANNELS)) * 3000).astype(np.float32)
+
+
+def time_per_frame(fn, frames, repeats=3):
+    """Best-of-N mean time per frame in microseconds."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for frame in frames:
+            fn(frame)
+        elapsed = (time.perf_counter() - start) / len(frames)
+        best = min(best, elapsed)
+    return best * 1e6
+
+
+def bench_effect(factory, frames):
+    fx = factory()
+    fx.enabled = True
+    return time_per_frame(fx.process, frames)
+
+
+def bench_stack(factories, frames):
+    chain = [f() for f in factories]
+
+    def run(block):
+        for fx in chain:
+            block = fx.process(block)
+        return block
+
+    return time_per_frame(run, frames)
+
+
+def bench_aux_mix(frames):
+    """Ring write (callback side) + ring read + ducking + mix for one secondary source."""
+    ring = RingBuffer(CHUNK * 12, CHANNELS)
+    ducker = Ducker()
+
+    def run(frame):
+        ring.write(frame)
+        aux = ring.read(CHUNK)
+        return frame + ducker.process(frame, aux)
+
+    return time_per_frame(run, frames)
+
+
+def bench_meters(frames):
+    """Audio-thread side of the GUI meters (MeterSnapshot.publish)."""
+    snapshot = MeterSnapshot(chunk=CHUNK, channels=CHANNELS, rate=RATE)
+
+    def run(frame):
+        flat = frame.reshape(-1)
+        snapshot.publish(flat, flat)
+
+    return time_per_frame(run, frames)
+
+
+def bench_chain(frames, **settings):
+    chain = DSPChain(chunk=CHUNK, channels=CHANNELS, rate=RATE, **settings)
+    return time_per_frame(lambda frame: chain.process(frame.reshape(-1)), frames)
+
+
+def bench_compile():
+    """Cost of building a chain (runs on the GUI thread, never on the audio thread)."""
+    start = time.perf_counter()
+    for _ in range(200):
+        DSPChain(gain=2.0, pitch_factor=0.8, eq_db=(6, -3, 4), chunk=CHUNK, channels=CHANNELS, rate=RATE)
+    return (time.perf_counter() - start) / 200 * 1e6
+
+
+MODULATION = {
+    'chorus': Chorus,
+    'flanger': Flanger,
+    'vibrato': Vibrato,
+    'tremolo': Tremolo,
+}
+
+STACKS = {
+    'chorus+tremolo': [Chorus, Tremolo],
+    'vibrato+chorus+flanger': [Vibrato, Chorus, Flanger],
+    'all modulation': [Vibrato, Chorus, Flanger, Tremolo],
+}
+
+
+def report(name, us):
+    print(f"  {name:<28} {us:9.1f} us/frame  {100.0 * us / FRAME_BUDGET_US:6.2f}% of budget")
+
+
+def main():
+    frames = make_frames()
+    print(f"Frame: {CHUNK} samples x {CHANNELS} ch @ {RATE} Hz, budget {FRAME_BUDGET_US:.0f} us")
+
+    print("Static chain:")
+    full = dict(gain=2.0, pitch_factor=0.8, eq_db=(6, -3, 4))
+    report('pitch+3 EQ+gain', bench_chain(frames, **full))
+    report('preset switch frame (2x)', 2 * bench_chain(frames, **full))
+    report('chain compile, per change', bench_compile())
+
+    print("Governor quality levels:")
+    for level, name in enumerate(LEVEL_NAMES):
+        report(f"{level}: {name}", bench_chain(frames, quality=level, **full))
+
+    print("Modulation effects:")
+    for name, factory in MODULATION.items():
+        report(name, bench_effect(factory, frames))
+
+    print("Stacked:")
+    worst = 0.0
+    for name, factories in STACKS.items():
+        us = bench_stack(factories, frames)
+        worst = max(worst, us)
+        report(name, us)
+
+    print("Mixing:")
+    report('secondary input + ducking', bench_aux_mix(frames))
+
+    print("Monitoring:")
+    report('meter snapshot publish', bench_meters(frames))
+
+    return 0 if worst < FRAME_BUDGET_US else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
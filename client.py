@@ -1,7 +1,12 @@
 import discord
 import asyncio
+import logging
+import random
+import time
 import discord.opus
 
+log = logging.getLogger("booster.voice")
+
 # FORCE OPUS TO USE 'AUDIO' MODE (Music) INSTEAD OF 'VOIP'
 # This disables the built-in library noise suppression/filtering for "raw" sound.
 # VoIP = 2048, Audio = 2049
@@ -18,14 +23,25 @@ if hasattr(discord.opus, 'APPLICATION_AUDIO'):
          pass
 
 class DiscordClient(discord.Client):
+    # Voice supervisor timing (seconds)
+    SUPERVISOR_INTERVAL = 0.5
+    RECONNECT_GRACE = 3.0      # let discord.py's own voice reconnect try first
+    RECONNECT_BASE = 0.5
+    RECONNECT_CAP = 30.0
+
     def __init__(self, audio_handler):
         super().__init__()
         self.audio_handler = audio_handler
         self.vc = None
         self.ready_event = asyncio.Event()
 
+        # Voice connection supervisor
+        self.target_channel_id = None
+        self.supervisor_task = None
+        self.reconnect_stats = [] # one dict per recovered disconnect
+
     async def on_ready(self):
-        print(f'Logged in as {self.user} (ID: {self.user.id})')
+        log.info("logged in as %s", self.user, extra={'user_id': self.user.id})
         self.ready_event.set()
 
     async def join_channel(self, channel_id):
@@ -42,37 +58,35 @@ class DiscordClient(discord.Client):
                     raise Exception(f"No permission to access channel {channel_id}.")
 
             if isinstance(channel, discord.VoiceChannel) or isinstance(channel, discord.StageChannel):
-                 print(f"Connecting to {channel.name}...")
+                 log.info("connecting to %s", channel.name, extra={'channel_id': channel.id})
                  try:
                     # Attempt connection with a reasonable timeout (10s).
                     # Sometimes the handshake hangs but the connection is established in background.
                     # We wrap channel.connect because the internal timeout might behave differently or be None.
                     try:
-                        print(f"Attempting to join {channel.name} (10s wait)...")
+                        t0 = time.monotonic()
                         # self_deaf=True is crucial for self-bots stability
                         wait_coro = channel.connect(timeout=10.0, self_deaf=True)
                         # Note: distinct from asyncio.wait_for, channel.connect internal timeout handles handshake
                         self.vc = await wait_coro
-                        print(f"Joined {channel.name} successfully.")
+                        log.info("joined %s", channel.name, extra={'connect_s': time.monotonic() - t0})
                     except (asyncio.TimeoutError, Exception) as e:
-                        print(f"Connection handshake timed out or failed: {e}")
-                        print("Checking if connected anyway...")
+                        log.warning("connection handshake timed out or failed: %r, checking if connected anyway", e)
                         # Fallback: Check if we are connected despite the timeout (common with self-bots/network lag)
                         guild_vc = channel.guild.voice_client
                         if guild_vc and guild_vc.is_connected():
                              self.vc = guild_vc
-                             print(f"Recovered connection to {channel.name}!")
+                             log.info("recovered connection to %s", channel.name)
                         else:
                              raise Exception(f"Connection failed: {e}")
 
                  except Exception as e:
-                     import traceback
-                     traceback.print_exc()
+                     log.exception("voice connect failed")
                      raise Exception(f"Failed to connect: {repr(e)}")
 
                  # Start transmitting audio only if connected
                  if self.vc and self.vc.is_connected():
-                     print("Starting audio transmission...")
+                     log.info("starting audio transmission")
                      
                      # --- FORCE RAW AUDIO SETTINGS ---
                      # We need to ensure the audio player uses the "Audio" application mode
@@ -101,18 +115,126 @@ class DiscordClient(discord.Client):
                           except:
                                pass
                      else:
-                          print("Already playing audio.")
+                          log.info("already playing audio")
+                     self.start_supervisor(channel.id)
                  else:
-                     print("Voice client not connected, skipping audio playback.")
+                     log.warning("voice client not connected, skipping audio playback")
             else:
                  raise Exception(f"Channel {getattr(channel, 'name', channel_id)} is not a voice/stage channel.")
 
         except Exception as e:
-            print(f"Error joining channel: {e}")
+            log.error("error joining channel: %s", e, extra={'channel_id': channel_id})
             raise e
 
+    def start_supervisor(self, channel_id):
+        self.target_channel_id = channel_id
+        if self.supervisor_task is None or self.supervisor_task.done():
+            self.supervisor_task = asyncio.create_task(self._supervise(), name="voice-supervisor")
+
+    async def stop_supervisor(self):
+        self.target_channel_id = None
+        task = self.supervisor_task
+        self.supervisor_task = None
+        if task and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _voice_alive(self):
+        return self.vc is not None and self.vc.is_connected()
+
+    async def _supervise(self):
+        """Watch the voice connection and bring it back if it drops."""
+        # Keep capture/DSP running whenever the player is not pulling frames
+        await self.audio_handler.run_blocking(self.audio_handler.keep_warm, True)
+        try:
+            while self.target_channel_id is not None and not self.is_closed():
+                await asyncio.sleep(self.SUPERVISOR_INTERVAL)
+                try:
+                    if not await self._supervise_once():
+                        return # left the channel or logged out meanwhile
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    # e.g. play() racing a fresh disconnect; the next pass sees the new state
+                    log.warning("voice supervisor error: %r", e,
+                                extra={'channel_id': self.target_channel_id})
+        finally:
+            await self.audio_handler.run_blocking(self.audio_handler.keep_warm, False)
+
+    async def _supervise_once(self):
+        """One supervisor pass. Returns False when supervision should stop."""
+        if self._voice_alive():
+            if not self.vc.is_playing():
+                log.warning("voice connected but idle, restarting audio transmission")
+                self.vc.play(self.audio_handler)
+            return True
+
+        lost_at = time.monotonic()
+        log.warning("voice connection lost, waiting for discord.py to recover",
+                    extra={'channel_id': self.target_channel_id})
+        while time.monotonic() - lost_at < self.RECONNECT_GRACE:
+            await asyncio.sleep(self.SUPERVISOR_INTERVAL)
+            if self._voice_alive():
+                break
+
+        attempts = 0
+        if not self._voice_alive():
+            attempts = await self._reconnect_with_backoff()
+            if attempts is None:
+                return False
+
+        if not self.vc.is_playing():
+            self.vc.play(self.audio_handler)
+        await self._record_recovery(lost_at, attempts)
+        return True
+
+    async def _reconnect_with_backoff(self):
+        """Reconnect with full-jitter exponential backoff. Returns the attempt count."""
+        attempt = 0
+        while self.target_channel_id is not None and not self.is_closed():
+            attempt += 1
+            log.info("reconnecting to voice", extra={'attempt': attempt})
+            channel = None
+            try:
+                if self.vc:
+                    await self.vc.disconnect(force=True)
+                    self.vc = None
+                channel = self.get_channel(self.target_channel_id) or await self.fetch_channel(self.target_channel_id)
+                self.vc = await channel.connect(timeout=10.0, self_deaf=True)
+                return attempt
+            except Exception as e:
+                guild_vc = getattr(getattr(channel, 'guild', None), 'voice_client', None)
+                if guild_vc and guild_vc.is_connected():
+                    self.vc = guild_vc
+                    return attempt
+                delay = random.uniform(0, min(self.RECONNECT_CAP, self.RECONNECT_BASE * 2 ** attempt))
+                log.warning("voice reconnect failed: %r", e, extra={'attempt': attempt, 'retry_in_s': delay})
+                await asyncio.sleep(delay)
+        return None
+
+    async def _record_recovery(self, lost_at, attempts):
+        """Time from losing the connection until the player pulls the first frame again."""
+        resumed_at = time.monotonic()
+        deadline = resumed_at + 5.0
+        while self.audio_handler.last_player_read < resumed_at and time.monotonic() < deadline:
+            await asyncio.sleep(0.005)
+        first_frame = self.audio_handler.last_player_read
+        stats = {
+            'attempts': attempts,
+            'downtime': resumed_at - lost_at,
+            'time_to_audio': (first_frame - lost_at) if first_frame >= resumed_at else None,
+        }
+        self.reconnect_stats.append(stats)
+        log.info("voice recovered", extra={'attempts': attempts,
+                                           'downtime_s': stats['downtime'],
+                                           'time_to_audio_s': stats['time_to_audio']})
+
     async def leave_channel(self):
+        await self.stop_supervisor()
         if self.vc:
             await self.vc.disconnect()
             self.vc = None
-            print("Disconnected from voice channel.")
+            log.info("disconnected from voice channel")
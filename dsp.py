@@ -0,0 +1,165 @@
+import numpy as np
+import scipy.signal
+
+# Static DSP: biquad EQ design and the compiled pitch -> EQ -> gain chain.
+# Depends only on numpy/scipy, so offline tools (render.py, bench.py) can use
+# it without PortAudio or discord.py.
+
+
+def design_low_shelf(cutoff, gain_db, fs=48000, Q=0.707):
+    A = 10**(gain_db/40.0)
+    w0 = 2 * np.pi * cutoff / fs
+    alpha = np.sin(w0) / (2 * Q)
+    cos_w0 = np.cos(w0)
+
+    b0 =    A * ((A+1) - (A-1)*cos_w0 + 2*np.sqrt(A)*alpha)
+    b1 =  2*A * ((A-1) - (A+1)*cos_w0)
+    b2 =    A * ((A+1) - (A-1)*cos_w0 - 2*np.sqrt(A)*alpha)
+    a0 =        (A+1) + (A-1)*cos_w0 + 2*np.sqrt(A)*alpha
+    a1 =   -2 * ((A-1) + (A+1)*cos_w0)
+    a2 =        (A+1) + (A-1)*cos_w0 - 2*np.sqrt(A)*alpha
+
+    return np.array([b0, b1, b2, a0, a1, a2]) / a0
+
+
+def design_high_shelf(cutoff, gain_db, fs=48000, Q=0.707):
+    A = 10**(gain_db/40.0)
+    w0 = 2 * np.pi * cutoff / fs
+    alpha = np.sin(w0) / (2 * Q)
+    cos_w0 = np.cos(w0)
+
+    b0 =    A * ((A+1) + (A-1)*cos_w0 + 2*np.sqrt(A)*alpha)
+    b1 = -2*A * ((A-1) + (A+1)*cos_w0)
+    b2 =    A * ((A+1) + (A-1)*cos_w0 - 2*np.sqrt(A)*alpha)
+    a0 =        (A+1) - (A-1)*cos_w0 + 2*np.sqrt(A)*alpha
+    a1 =    2 * ((A-1) - (A+1)*cos_w0)
+    a2 =        (A+1) - (A-1)*cos_w0 - 2*np.sqrt(A)*alpha
+
+    return np.array([b0, b1, b2, a0, a1, a2]) / a0
+
+
+def design_peaking(cutoff, gain_db, fs=48000, Q=1.0):
+    A = 10**(gain_db/40.0)
+    w0 = 2 * np.pi * cutoff / fs
+    alpha = np.sin(w0) / (2 * Q)
+    cos_w0 = np.cos(w0)
+
+    b0 =   1 + alpha*A
+    b1 =  -2*cos_w0
+    b2 =   1 - alpha*A
+    a0 =   1 + alpha/A
+    a1 =  -2*cos_w0
+    a2 =   1 - alpha/A
+
+    return np.array([b0, b1, b2, a0, a1, a2]) / a0
+
+
+class DSPChain:
+    """
+    Compiled static part of the effect chain: pitch -> EQ -> gain.
+    Filter coefficients and pitch interpolation tables are computed once, off
+    the audio thread, whenever a setting changes; read() only calls process().
+    Instances are never modified after construction, so the audio thread can
+    hold one while the GUI builds the next.
+
+    quality > 0 builds a cheaper variant for the overload governor (see
+    governor.py): 1 = nearest-bin pitch shift, 2 = also only the strongest EQ
+    band, 3 = also pitch-shift a mono downmix. A full-quality chain precompiles all its
+    variants, so stepping down is only an index on the audio thread.
+    """
+    EQ_BANDS = ((design_low_shelf, 100), (design_peaking, 1000), (design_high_shelf, 8000))
+
+    def __init__(self, gain=1.0, pitch_factor=1.0, eq_db=(0.0, 0.0, 0.0),
+                 chunk=960, channels=2, rate=48000, modulation=None, quality=0):
+        self.gain = gain
+        self.pitch_factor = pitch_factor
+        self.eq_db = tuple(eq_db)
+        self.channels = channels
+        # Effect parameters to apply together with this chain (presets), or None
+        self.modulation = modulation
+        self.quality = quality
+        # Pitch-shift a downmix once and duplicate it (only pitch gets cheaper)
+        self.mono = quality >= 3 and channels > 1 and pitch_factor != 1.0
+
+        # Pitch tables: output bin k takes the (interpolated) input bin k / factor
+        self.pitch_tables = None
+        if pitch_factor != 1.0:
+            n_freqs = chunk // 2 + 1
+            src = np.clip(np.arange(n_freqs) / pitch_factor, 0, n_freqs - 1)
+            if quality >= 1:
+                self.pitch_tables = (np.rint(src).astype(np.intp), None)
+            else:
+                i0 = np.minimum(src.astype(np.intp), n_freqs - 2)
+                frac = (src - i0)[:, np.newaxis]
+                self.pitch_tables = (i0, frac)
+
+        bands = [(design, cutoff, db) for (design, cutoff), db in zip(self.EQ_BANDS, self.eq_db)
+                 if abs(db) > 0.1]
+        if quality >= 2 and bands:
+            bands = [max(bands, key=lambda band: abs(band[2]))]
+        self.eq_sections = []
+        for design, cutoff, db in bands:
+            coeffs = design(cutoff, db, fs=rate)
+            self.eq_sections.append((coeffs[:3], coeffs[3:]))
+
+        self.variants = None
+        if quality == 0:
+            self.variants = (self,) + tuple(
+                DSPChain(gain, pitch_factor, eq_db, chunk, channels, rate, quality=level)
+                for level in (1, 2, 3))
+
+    def variant(self, quality):
+        """The precompiled variant of this chain for a governor quality level."""
+        if self.variants is None:
+            return self
+        return self.variants[quality]
+
+    def _shift_pitch_fft(self, audio_chunk, channels):
+        """
+        Naive pitch shift using FFT scaling.
+        Produces robotic/alien artifacts but maintains strict 1:1 timing (zero latency drift).
+        """
+        # Reshape to ([Frames,] N_samples, Channels), FFT along time
+        shape = audio_chunk.shape
+        audio_chunk = audio_chunk.reshape(shape[:-1] + (-1, channels))
+        n_samples = audio_chunk.shape[-2]
+        freq_domain = np.fft.rfft(audio_chunk, axis=-2)
+
+        # Shift UP: F_new = F_old * factor, so content at index k comes from k / factor.
+        # Linear interpolation of the complex bins (real and imag together).
+        i0, frac = self.pitch_tables
+        if frac is None:
+            shifted_freq_domain = freq_domain[..., i0, :] # nearest bin (reduced quality)
+        else:
+            shifted_freq_domain = (freq_domain[..., i0, :] * (1.0 - frac)
+                                   + freq_domain[..., i0 + 1, :] * frac)
+
+        shifted_time = np.fft.irfft(shifted_freq_domain, n=n_samples, axis=-2)
+        return shifted_time.reshape(shape).astype(np.float32)
+
+    def process(self, audio_data):
+        """
+        audio_data: one interleaved frame, or a stack of them shaped
+        (n_frames, chunk * channels) (offline rendering). Every frame is
+        processed on its own, exactly as read() would.
+        """
+        if self.mono:
+            # Pitch-shift the downmix once; EQ still runs on the interleaved
+            # stream below, so the EQ response matches the other levels
+            frame = audio_data.reshape(audio_data.shape[:-1] + (-1, self.channels))
+            audio_data = (frame[..., 0] + frame[..., -1]) * 0.5
+            if self.pitch_tables is not None:
+                audio_data = self._shift_pitch_fft(audio_data, 1)
+            audio_data = np.repeat(audio_data, self.channels, axis=-1)
+        elif self.pitch_tables is not None:
+            # 1. Pitch Shift (FFT-based, Zero Latency)
+            audio_data = self._shift_pitch_fft(audio_data, self.channels)
+
+        # 2. Apply EQ
+        for b, a in self.eq_sections:
+            audio_data = scipy.signal.lfilter(b, a, audio_data)
+
+        # 3. Apply Gain
+        if self.gain != 1.0:
+            audio_data = audio_data * self.gain
+        return audio_data
@@ -0,0 +1,188 @@
+import numpy as np
+
+# Modulation effects built on a shared fractional delay line.
+# Everything here works on whole blocks shaped (N_samples, Channels):
+# the LFO curve for a block is generated with one vectorized call and the
+# delay line reads all N taps at once with linear interpolation.
+# Phase and delay history are carried across calls, so the block size
+# can change between read() calls without clicks. Switching an effect on or
+# off fades its output over one block (run()); while off, a delay effect
+# keeps its history fed so it comes back without a burst of stale or
+# zeroed audio.
+
+
+class FractionalDelayLine:
+    """
+    Delay line with a per-sample (fractional) delay.
+    Keeps the last `max_delay` input samples between blocks.
+    """
+    def __init__(self, max_delay, channels):
+        self.max_delay = int(np.ceil(max_delay)) + 2
+        self.channels = channels
+        self.history = np.zeros((self.max_delay, channels), dtype=np.float32)
+
+    def reset(self):
+        self.history[:] = 0.0
+
+    def process(self, block, delay):
+        """
+        block: (N, C) input samples.
+        delay: delay in samples, shape (N,) or (N, C). Clamped to [0, max_delay - 2].
+        Returns the delayed signal, shape (N, C).
+        """
+        n = block.shape[0]
+        buf = np.concatenate((self.history, block.astype(np.float32, copy=False)), axis=0)
+
+        delay = np.clip(delay, 0.0, self.max_delay - 2)
+        if delay.ndim == 1:
+            delay = delay[:, np.newaxis]
+
+        # Read position of every output sample inside `buf`
+        pos = (self.max_delay + np.arange(n))[:, np.newaxis] - delay
+        # delay 0 reads the newest sample: keep i0 + 1 in range, frac is then 1.0
+        i0 = np.minimum(np.floor(pos).astype(np.intp), buf.shape[0] - 2)
+        frac = (pos - i0).astype(np.float32)
+        cols = np.arange(self.channels)[np.newaxis, :]
+
+        out = buf[i0, cols] * (1.0 - frac) + buf[i0 + 1, cols] * frac
+
+        self.history = buf[-self.max_delay:].copy()
+        return out
+
+    def feed(self, block):
+        """Push a block into the history without reading (effect switched off)."""
+        n = block.shape[0]
+        if n >= self.max_delay:
+            self.history = block[-self.max_delay:].astype(np.float32)
+        else:
+            self.history = np.concatenate((self.history[n:], block.astype(np.float32, copy=False)), axis=0)
+
+
+class ModulationEffect:
+    """
+    Base class: sine LFO with phase carried across blocks.
+    `spread` offsets the LFO phase per channel (0.0 = all channels in phase).
+    """
+    def __init__(self, rate=1.0, depth=0.5, mix=0.5, spread=0.0, fs=48000, channels=2):
+        self.enabled = False
+        self.rate = rate
+        self.depth = depth
+        self.mix = mix
+        self.spread = spread
+        self.fs = fs
+        self.channels = channels
+        self.phase = 0.0
+        self.level = 0.0  # current wet gain of run(), follows `enabled` one block at a time
+
+    def reset(self):
+        self.phase = 0.0
+
+    def settle(self):
+        """Jump to the enabled/disabled state without a fade (nothing audible to fade from)."""
+        self.level = 1.0 if self.enabled else 0.0
+
+    def save_state(self):
+        """Snapshot of everything process()/run() advance, for restore_state()."""
+        return self.phase, self.level
+
+    def restore_state(self, state):
+        self.phase, self.level = state
+
+    def idle(self, block):
+        """Called instead of process() while the effect is off."""
+
+    def run(self, block):
+        """
+        process() with on/off fades: after `enabled` changes, the next block
+        crossfades between the dry input and the effect output.
+        """
+        target = 1.0 if self.enabled else 0.0
+        if target == 0.0 and self.level == 0.0:
+            self.idle(block)
+            return block
+        out = self.process(block)
+        if self.level == target:
+            return out
+        ramp = np.linspace(self.level, target, block.shape[0], dtype=np.float32)[:, np.newaxis]
+        self.level = target
+        return block + (out - block) * ramp
+
+    def _lfo(self, n):
+        """Unipolar LFO (0..1) for the next n samples, shape (N, C)."""
+        step = 2 * np.pi * self.rate / self.fs
+        phases = self.phase + step * np.arange(n)
+        self.phase = float((self.phase + step * n) % (2 * np.pi))
+
+        offsets = np.pi * self.spread * np.arange(self.channels)
+        return 0.5 + 0.5 * np.sin(phases[:, np.newaxis] + offsets[np.newaxis, :])
+
+    def process(self, block):
+        raise NotImplementedError
+
+
+class _DelayModulation(ModulationEffect):
+    """Delay swept between base_ms and base_ms + sweep_ms * depth."""
+    base_ms = 0.0
+    sweep_ms = 0.0
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        max_delay = (self.base_ms + self.sweep_ms) * self.fs / 1000.0
+        self.delay_line = FractionalDelayLine(max_delay, self.channels)
+
+    def reset(self):
+        super().reset()
+        self.delay_line.reset()
+
+    def save_state(self):
+        return super().save_state(), self.delay_line.history
+
+    def restore_state(self, state):
+        # process() and feed() replace history with a new array, so the saved one is intact
+        state, self.delay_line.history = state
+        super().restore_state(state)
+
+    def idle(self, block):
+        self.delay_line.feed(block)
+
+    def process(self, block):
+        lfo = self._lfo(block.shape[0])
+        delay = (self.base_ms + self.sweep_ms * self.depth * lfo) * (self.fs / 1000.0)
+        wet = self.delay_line.process(block, delay)
+        return block * (1.0 - self.mix) + wet * self.mix
+
+
+class Chorus(_DelayModulation):
+    base_ms = 15.0
+    sweep_ms = 10.0
+
+    def __init__(self, rate=0.8, depth=0.5, mix=0.5, spread=0.5, **kwargs):
+        super().__init__(rate=rate, depth=depth, mix=mix, spread=spread, **kwargs)
+
+
+class Flanger(_DelayModulation):
+    # Feed-forward flanger (no feedback path, so blocks stay fully vectorized)
+    base_ms = 0.5
+    sweep_ms = 4.0
+
+    def __init__(self, rate=0.25, depth=0.8, mix=0.5, spread=0.0, **kwargs):
+        super().__init__(rate=rate, depth=depth, mix=mix, spread=spread, **kwargs)
+
+
+class Vibrato(_DelayModulation):
+    # Pure pitch wobble: only the delayed signal is heard
+    base_ms = 1.0
+    sweep_ms = 6.0
+
+    def __init__(self, rate=5.0, depth=0.3, mix=1.0, spread=0.0, **kwargs):
+        super().__init__(rate=rate, depth=depth, mix=mix, spread=spread, **kwargs)
+
+
+class Tremolo(ModulationEffect):
+    # Amplitude modulation, no delay line needed
+    def __init__(self, rate=5.0, depth=0.5, spread=0.0, **kwargs):
+        super().__init__(rate=rate, depth=depth, mix=1.0, spread=spread, **kwargs)
+
+    def process(self, block):
+        lfo = self._lfo(block.shape[0])
+        return block * (1.0 - self.depth * lfo)
@@ -0,0 +1,91 @@
+import time
+import logging
+from collections import deque
+
+log = logging.getLogger("booster.audio")
+
+# CPU overload governor.
+# AudioHandler reports how long each frame's processing took. When the budget
+# is exceeded too often the effect chain steps down one quality level; after
+# a long enough stretch with plenty of headroom it steps back up. Levels are
+# cumulative: level 2 also uses the cheap pitch shifter, and so on.
+
+LEVEL_NAMES = (
+    "full quality",
+    "cheap pitch shift",
+    "single EQ band",
+    "mono processing",
+)
+MAX_LEVEL = len(LEVEL_NAMES) - 1
+
+
+class QualityGovernor:
+    def __init__(self, budget_ms=10.0, window=10, overruns_to_degrade=3,
+                 headroom=0.5, recover_frames=150, max_recover_frames=1500, keep_transitions=100):
+        self.enabled = True
+        self.budget = budget_ms / 1000.0
+        self.window = deque(maxlen=window)
+        self.overruns_to_degrade = overruns_to_degrade
+        self.headroom = headroom              # step up only while below headroom * budget
+        self.base_recover_frames = recover_frames
+        self.recover_frames = recover_frames  # grows when stepping up does not stick
+        self.max_recover_frames = max_recover_frames
+        self.level = 0
+        self.calm_frames = 0
+        self.since_step_up = None  # frames since a step up that has not held yet, else None
+        # Most recent (monotonic time, old level, new level, reason)
+        self.transitions = deque(maxlen=keep_transitions)
+
+    def set_budget(self, budget_ms):
+        self.budget = max(0.1, float(budget_ms)) / 1000.0
+
+    def record(self, elapsed):
+        """Audio thread, once per frame. Returns the quality level to use."""
+        if not self.enabled:
+            if self.level:
+                self._step(0, "governor disabled")
+            self.recover_frames = self.base_recover_frames
+            self.since_step_up = None
+            return self.level
+
+        over = elapsed > self.budget
+        self.window.append(over)
+        if self.since_step_up is not None:
+            self.since_step_up += 1
+            if self.since_step_up >= self.recover_frames:
+                # The last step up held: back to the normal recovery wait
+                self.recover_frames = self.base_recover_frames
+                self.since_step_up = None
+
+        if over and self.level < MAX_LEVEL and sum(self.window) >= self.overruns_to_degrade:
+            # Stepping down right after stepping up: wait longer before the next attempt
+            if self.since_step_up is not None:
+                self.recover_frames = min(self.max_recover_frames, self.recover_frames * 2)
+            self._step(self.level + 1, f"{sum(self.window)}/{len(self.window)} frames over budget", elapsed)
+            return self.level
+
+        if elapsed < self.budget * self.headroom:
+            self.calm_frames += 1
+            if self.level > 0 and self.calm_frames >= self.recover_frames:
+                self._step(self.level - 1, f"{self.calm_frames} frames with headroom", elapsed)
+                self.since_step_up = 0
+        else:
+            self.calm_frames = 0
+        return self.level
+
+    def _step(self, new_level, reason, elapsed=0.0):
+        old = self.level
+        self.level = new_level
+        self.window.clear()
+        self.calm_frames = 0
+        self.transitions.append((time.monotonic(), old, new_level, reason))
+        # INFO: WARNING on this logger is rate-limited (logsetup.py), which would drop
+        # most transitions of a quick 0 -> 1 -> 2 -> 3 burst
+        log.info("quality %s: %s -> %s (%s)",
+                 "reduced" if new_level > old else "restored",
+                 LEVEL_NAMES[old], LEVEL_NAMES[new_level], reason,
+                 extra={'level': new_level, 'frame_ms': elapsed * 1000,
+                        'budget_ms': self.budget * 1000})
+
+    def status(self):
+        return self.level, LEVEL_NAMES[self.level]
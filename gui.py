@@ -1,11 +1,20 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, 
                              QLabel, QLineEdit, QPushButton, QSlider, 
                              QHBoxLayout, QMessageBox, QComboBox, QFrame,
-                             QGraphicsDropShadowEffect, QScrollArea)
+                             QGraphicsDropShadowEffect, QScrollArea, QCheckBox,
+                             QInputDialog)
 from PyQt6.QtCore import Qt, QSize, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt6.QtGui import QFont, QIcon, QColor, QPalette
+from PyQt6.QtGui import QFont, QIcon, QColor, QPalette, QPainter
+import time
 import asyncio
+import logging
+import numpy as np
 import qasync
+import meters
+from governor import LEVEL_NAMES
+from presets import PresetStore
+
+log = logging.getLogger("booster.gui")
 
 # Modern Discord Colors (2024/2025 Palette)
 DISCORD_BG = "#313338"       # Main background
@@ -31,6 +40,88 @@ class ModernCard(QFrame):
             }}
         """)
 
+METER_FPS = 30          # GUI redraw cap for meters/spectrum
+METER_FLOOR_DB = -60.0
+CLIP_HOLD_SECONDS = 1.0
+
+
+def level_to_fraction(level):
+    """Linear 0..1 full-scale level -> 0..1 on a dB scale from METER_FLOOR_DB to 0 dB."""
+    if level <= 0.0:
+        return 0.0
+    db = 20.0 * np.log10(level)
+    return min(1.0, max(0.0, 1.0 - db / METER_FLOOR_DB))
+
+
+class LevelMeter(QWidget):
+    """Input and output bars: RMS fill, peak tick and a clip lamp."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedHeight(44)
+        self.levels = {'in': (0.0, 0.0), 'out': (0.0, 0.0)}  # (peak, rms) as 0..1 fractions
+        self.clip_until = 0.0
+
+    def set_levels(self, in_peak, in_rms, out_peak, out_rms, clipped):
+        now = time.monotonic()
+        if clipped:
+            self.clip_until = now + CLIP_HOLD_SECONDS
+        # Peak falls back slowly so short transients stay visible
+        old_in, old_out = self.levels['in'][0], self.levels['out'][0]
+        self.levels = {
+            'in': (max(level_to_fraction(in_peak), old_in * 0.9), level_to_fraction(in_rms)),
+            'out': (max(level_to_fraction(out_peak), old_out * 0.9), level_to_fraction(out_rms)),
+        }
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        w, h = self.width(), self.height()
+        lamp = 14
+        bar_w = w - lamp - 36
+        bar_h = (h - 6) // 2
+        painter.setPen(QColor(DISCORD_SUBTEXT))
+        for row, key in enumerate(('in', 'out')):
+            y = row * (bar_h + 6)
+            peak, rms = self.levels[key]
+            painter.drawText(0, y, 28, bar_h, int(Qt.AlignmentFlag.AlignVCenter), key.upper())
+            painter.fillRect(30, y, bar_w, bar_h, QColor(DISCORD_INPUT))
+            color = QColor(DISCORD_GREEN) if peak < 0.9 else QColor("#f0b232")
+            painter.fillRect(30, y, int(bar_w * rms), bar_h, color)
+            painter.fillRect(30 + int(bar_w * peak) - 2, y, 2, bar_h, QColor(DISCORD_HEADER))
+        clip_color = DISCORD_RED if time.monotonic() < self.clip_until else DISCORD_INPUT
+        painter.fillRect(w - lamp, bar_h + 6, lamp, bar_h, QColor(clip_color))
+        painter.end()
+
+
+class SpectrumView(QWidget):
+    """Log-frequency bar spectrum of the output."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFixedHeight(80)
+        self.bands = None
+
+    def set_bands(self, bands_db):
+        if self.bands is not None and len(self.bands) == len(bands_db):
+            # Fast attack, slow release
+            bands_db = np.maximum(bands_db, self.bands - 3.0)
+        self.bands = bands_db
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        w, h = self.width(), self.height()
+        painter.fillRect(0, 0, w, h, QColor(DISCORD_INPUT))
+        if self.bands is not None:
+            n = len(self.bands)
+            bar_w = w / n
+            heights = np.clip(1.0 - self.bands / METER_FLOOR_DB, 0.0, 1.0) * h
+            color = QColor(DISCORD_BLURPLE)
+            for i, bar_h in enumerate(heights):
+                x = int(i * bar_w)
+                painter.fillRect(x, int(h - bar_h), max(1, int(bar_w) - 1), int(bar_h), color)
+        painter.end()
+
+
 class MainWindow(QMainWindow):
     def __init__(self, discord_client, audio_handler):
         super().__init__()
@@ -185,7 +276,8 @@ class MainWindow(QMainWindow):
         dev_layout.addWidget(lbl_dev)
         
         self.device_combo = QComboBox()
-        self.populate_devices()
+        self.active_device_pos = -1
+        self.device_switches = 0
         self.device_combo.currentIndexChanged.connect(self.change_device)
         dev_layout.addWidget(self.device_combo)
         aud_layout.addLayout(dev_layout)
@@ -214,14 +306,112 @@ class MainWindow(QMainWindow):
         gain_layout.addWidget(self.gain_slider)
         
         aud_layout.addLayout(gain_layout)
+
+        # Secondary Input (music / loopback)
+        aux_layout = QVBoxLayout()
+        aux_layout.setSpacing(8)
+        lbl_aux = QLabel("SECONDARY INPUT")
+        lbl_aux.setObjectName("SubHeader")
+        aux_layout.addWidget(lbl_aux)
+
+        self.aux_combo = QComboBox()
+        self.aux_combo.addItem("None", None)
+        aux_layout.addWidget(self.aux_combo)
+
+        aux_header_row = QHBoxLayout()
+        lbl_aux_vol = QLabel("SECONDARY VOLUME")
+        lbl_aux_vol.setObjectName("SubHeader")
+        aux_header_row.addWidget(lbl_aux_vol)
+
+        self.aux_val_label = QLabel("100%")
+        self.aux_val_label.setStyleSheet(f"color: {DISCORD_HEADER}; font-weight: bold; font-size: 12px;")
+        self.aux_val_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        aux_header_row.addWidget(self.aux_val_label)
+        aux_layout.addLayout(aux_header_row)
+
+        self.aux_slider = QSlider(Qt.Orientation.Horizontal)
+        self.aux_slider.setMinimum(0)
+        self.aux_slider.setMaximum(200)
+        self.aux_slider.setValue(100)
+        self.aux_slider.valueChanged.connect(self.update_aux_gain)
+        aux_layout.addWidget(self.aux_slider)
+
+        self.duck_check = QCheckBox("Duck while speaking")
+        self.duck_check.setChecked(True)
+        self.duck_check.setStyleSheet(f"color: {DISCORD_SUBTEXT}; font-size: 12px;")
+        self.duck_check.toggled.connect(self.update_ducking)
+        aux_layout.addWidget(self.duck_check)
+
+        aud_layout.addLayout(aux_layout)
         main_layout.addWidget(audio_card)
 
+        # === CARD: LEVELS (meters + spectrum) ===
+        levels_card = ModernCard()
+        lvl_layout = QVBoxLayout(levels_card)
+        lvl_layout.setSpacing(12)
+        lvl_layout.setContentsMargins(16, 16, 16, 16)
+
+        lbl_levels = QLabel("LEVELS")
+        lbl_levels.setObjectName("SubHeader")
+        lvl_layout.addWidget(lbl_levels)
+
+        self.level_meter = LevelMeter()
+        lvl_layout.addWidget(self.level_meter)
+        self.spectrum_view = SpectrumView()
+        lvl_layout.addWidget(self.spectrum_view)
+
+        # Shown while the CPU governor has reduced processing quality
+        self.quality_label = QLabel("")
+        self.quality_label.setStyleSheet("color: #f0b232; font-size: 12px;")
+        self.quality_label.setVisible(False)
+        lvl_layout.addWidget(self.quality_label)
+        self.quality_level = 0
+        main_layout.addWidget(levels_card)
+
+        # Meters are pulled from the audio thread's snapshot at a capped frame rate
+        self.meter_seq = -1
+        self.meter_timer = QTimer(self)
+        self.meter_timer.timeout.connect(self.refresh_meters)
+        self.meter_timer.start(1000 // METER_FPS)
+
         # === CARD 3: EFFECTS (Pitch & EQ) ===
         effects_card = ModernCard()
         fx_layout = QVBoxLayout(effects_card)
         fx_layout.setSpacing(16)
         fx_layout.setContentsMargins(16, 16, 16, 16)
 
+        # Presets (precompiled; switching crossfades at the next audio frame)
+        preset_layout = QVBoxLayout()
+        preset_layout.setSpacing(8)
+        lbl_preset = QLabel("PRESET")
+        lbl_preset.setObjectName("SubHeader")
+        preset_layout.addWidget(lbl_preset)
+
+        preset_row = QHBoxLayout()
+        preset_row.setSpacing(10)
+        self.preset_store = PresetStore(chunk=self.audio_handler.CHUNK,
+                                        channels=self.audio_handler.CHANNELS,
+                                        rate=self.audio_handler.RATE).load()
+        self.preset_combo = QComboBox()
+        self.preset_combo.addItems(self.preset_store.names())
+        self.preset_combo.activated.connect(self.load_preset)
+        preset_row.addWidget(self.preset_combo, 1)
+
+        self.preset_save_btn = QPushButton("Save")
+        self.style_button(self.preset_save_btn, DISCORD_BLURPLE, DISCORD_BLURPLE_HOVER)
+        self.preset_save_btn.setFixedSize(64, 38)
+        self.preset_save_btn.clicked.connect(self.save_preset)
+        preset_row.addWidget(self.preset_save_btn)
+
+        self.preset_delete_btn = QPushButton("Delete")
+        self.style_button(self.preset_delete_btn, DISCORD_RED, DISCORD_RED_HOVER)
+        self.preset_delete_btn.setFixedSize(64, 38)
+        self.preset_delete_btn.clicked.connect(self.delete_preset)
+        preset_row.addWidget(self.preset_delete_btn)
+
+        preset_layout.addLayout(preset_row)
+        fx_layout.addLayout(preset_layout)
+
         # Pitch
         pitch_layout = QVBoxLayout()
         header_pitch_row = QHBoxLayout()
@@ -350,6 +540,10 @@ class MainWindow(QMainWindow):
 
         main_layout.addStretch()
 
+        # Fill device lists once both combos exist (device enumeration runs off the loop)
+        self.aux_combo.currentIndexChanged.connect(self.change_aux_device)
+        asyncio.ensure_future(self.populate_devices())
+
     def style_button(self, button, color, hover_color):
         button.setStyleSheet(f"""
             QPushButton {{
@@ -373,6 +567,27 @@ class MainWindow(QMainWindow):
             }}
         """)
         
+    def refresh_meters(self):
+        snapshot = self.audio_handler.meters
+        seq, data = snapshot.read()
+        if seq == self.meter_seq:
+            return # no new audio frame since last redraw
+        self.meter_seq = seq
+        self.level_meter.set_levels(data[meters.IN_PEAK], data[meters.IN_RMS],
+                                    data[meters.OUT_PEAK], data[meters.OUT_RMS],
+                                    data[meters.CLIP] > 0.0)
+        self.spectrum_view.set_bands(snapshot.spectrum(data))
+        self.refresh_quality()
+
+    def refresh_quality(self):
+        level = self.audio_handler.quality
+        if level == self.quality_level:
+            return
+        self.quality_level = level
+        if level:
+            self.quality_label.setText(f"CPU overloaded - quality reduced ({LEVEL_NAMES[level]})")
+        self.quality_label.setVisible(level > 0)
+
     def show_error(self, title, message):
         """Safely show error message box without blocking the async loop directly."""
         QTimer.singleShot(0, lambda: QMessageBox.critical(self, title, message))
@@ -508,19 +723,120 @@ class MainWindow(QMainWindow):
         
         self.audio_handler.set_eq(l, m, h)
 
-    def populate_devices(self):
+    def load_preset(self):
+        name = self.preset_combo.currentText()
+        if not name:
+            return
+        settings = self.preset_store.get(name)
+        self.audio_handler.apply_chain(self.preset_store.chain(name))
+
+        # Move the sliders without triggering their handlers (which would recompile)
+        self.set_slider_silently(self.gain_slider, int(round(settings['gain_db'])))
+        self.set_slider_silently(self.pitch_slider, int(round(settings['pitch'] * 100)))
+        low, mid, high = (int(round(v)) for v in settings['eq'])
+        self.set_slider_silently(self.eq_low, low)
+        self.set_slider_silently(self.eq_mid, mid)
+        self.set_slider_silently(self.eq_high, high)
+        self.refresh_effect_labels()
+        log.info("preset loaded", extra={'preset': name})
+
+    def save_preset(self):
+        name, ok = QInputDialog.getText(self, "Save Preset", "Preset name:",
+                                        text=self.preset_combo.currentText())
+        name = name.strip()
+        if not ok or not name:
+            return
         try:
-            devices = self.audio_handler.get_input_devices()
+            self.preset_store.put(name, self.audio_handler.get_settings())
+        except Exception as e:
+            self.show_error("Preset Error", f"Failed to save preset: {e}")
+            return
+        if self.preset_combo.findText(name) < 0:
+            self.preset_combo.addItem(name)
+        self.preset_combo.setCurrentText(name)
+
+    def delete_preset(self):
+        name = self.preset_combo.currentText()
+        if not name:
+            return
+        try:
+            self.preset_store.delete(name)
+        except Exception as e:
+            self.show_error("Preset Error", f"Failed to delete preset: {e}")
+            return
+        self.preset_combo.removeItem(self.preset_combo.currentIndex())
+
+    def set_slider_silently(self, slider, value):
+        slider.blockSignals(True)
+        slider.setValue(value)
+        slider.blockSignals(False)
+
+    def refresh_effect_labels(self):
+        gain_db = self.gain_slider.value()
+        color = DISCORD_HEADER
+        if gain_db > 60: color = "#f0b232"
+        if gain_db > 100: color = DISCORD_RED
+        self.gain_val_label.setText(f"{gain_db} dB")
+        self.gain_val_label.setStyleSheet(f"color: {color}; font-weight: bold; font-size: 12px;")
+        self.pitch_val_label.setText(f"{self.pitch_slider.value() / 100.0:.1f}x")
+        self.val_low.setText(str(self.eq_low.value()))
+        self.val_mid.setText(str(self.eq_mid.value()))
+        self.val_high.setText(str(self.eq_high.value()))
+
+    async def populate_devices(self):
+        try:
+            devices = await self.audio_handler.run_blocking(self.audio_handler.get_input_devices)
+            self.device_combo.blockSignals(True)
+            self.aux_combo.blockSignals(True)
             for index, name in devices:
                 self.device_combo.addItem(name, index)
+                self.aux_combo.addItem(name, index)
+            self.device_combo.blockSignals(False)
+            self.aux_combo.blockSignals(False)
+            self.active_device_pos = self.device_combo.currentIndex()
         except Exception as e:
-            QTimer.singleShot(0, lambda: QMessageBox.warning(self, "Audio Error", f"Failed to list devices: {e}"))
-            
-    def change_device(self):
+            message = f"Failed to list devices: {e}"
+            QTimer.singleShot(0, lambda: QMessageBox.warning(self, "Audio Error", message))
+
+    @qasync.asyncSlot()
+    async def change_device(self):
         index = self.device_combo.currentData()
         if index is not None:
+            self.device_switches += 1
+            switch = self.device_switches
+            pos = self.device_combo.currentIndex()
             try:
-                self.audio_handler.start_stream(device_index=index)
-                print(f"Switched to device index: {index}")
+                # Open + warm-up run on the audio executor; the loop stays responsive
+                await self.audio_handler.run_blocking(self.audio_handler.start_stream, device_index=index)
+                self.active_device_pos = pos
+                log.info("switched input device", extra={'device': index})
             except Exception as e:
-                QTimer.singleShot(0, lambda: QMessageBox.warning(self, "Audio Error", f"Failed to switch device: {e}"))
+                if switch != self.device_switches:
+                    return # a newer selection is already being opened
+                # The previous device is still running; point the combo back at it
+                self.device_combo.blockSignals(True)
+                self.device_combo.setCurrentIndex(self.active_device_pos)
+                self.device_combo.blockSignals(False)
+                message = f"Failed to switch device: {e}"
+                QTimer.singleShot(0, lambda: QMessageBox.warning(self, "Audio Error", message))
+
+    @qasync.asyncSlot()
+    async def change_aux_device(self):
+        index = self.aux_combo.currentData()
+        try:
+            await self.audio_handler.run_blocking(self.audio_handler.start_aux_stream, device_index=index)
+            log.info("switched secondary input", extra={'device': index})
+        except Exception as e:
+            self.aux_combo.blockSignals(True)
+            self.aux_combo.setCurrentIndex(0)
+            self.aux_combo.blockSignals(False)
+            message = f"Failed to open secondary input: {e}"
+            QTimer.singleShot(0, lambda: QMessageBox.warning(self, "Audio Error", message))
+
+    def update_aux_gain(self):
+        value = self.aux_slider.value()
+        self.audio_handler.set_aux_gain(value / 100.0)
+        self.aux_val_label.setText(f"{value}%")
+
+    def update_ducking(self, checked):
+        self.audio_handler.set_ducking(checked)
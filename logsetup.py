@@ -0,0 +1,117 @@
+import time
+import queue
+import logging
+import logging.handlers
+
+# Non-blocking logging.
+# Every logger in the process hands its records to a bounded queue; a
+# QueueListener thread does the formatting-to-disk and console I/O. A log
+# call on the audio or event-loop thread therefore costs a put_nowait() and
+# never waits on a file or terminal. If the queue is full the record is
+# dropped and counted instead of blocking.
+#
+# Structured fields are passed with `extra=` and appended as key=value:
+#     log.info("stream opened", extra={'device': 3, 'open_ms': 41.2})
+# -> 2025-01-01 12:00:00,000:INFO:booster.audio: stream opened component=audio device=3 open_ms=41.2
+
+# Loggers that sit on the audio/voice hot paths get repeated warnings rate-limited
+HOT_PATH_LOGGERS = ('booster.audio', 'booster.voice')
+
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class StructuredFormatter(logging.Formatter):
+    def format(self, record):
+        text = super().format(record)
+        extra = {k: v for k, v in record.__dict__.items() if k not in _RECORD_ATTRS}
+        component = extra.pop('component', None)
+        fields = [f"component={component}"] if component else []
+        fields += [f"{k}={_format_value(v)}" for k, v in extra.items()]
+        if fields:
+            text += " " + " ".join(fields)
+        return text
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:.3f}".rstrip('0').rstrip('.')
+    return str(value)
+
+
+class ComponentFilter(logging.Filter):
+    """Tag every record with `component` (last part of the logger name) unless given."""
+    def filter(self, record):
+        if 'component' not in record.__dict__:
+            record.component = record.name.rsplit('.', 1)[-1]
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let one WARNING-or-above record per (logger, message template) through every
+    `interval` seconds. The next record that passes carries `suppressed=N`.
+    """
+    def __init__(self, interval=5.0):
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking on a full queue."""
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging(filename='discord.log', level=logging.INFO, queue_size=10000, error_interval=5.0):
+    """
+    Route all logging through a queue. Returns the started QueueListener;
+    call listener.stop() on exit to flush.
+    """
+    formatter = StructuredFormatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s')
+
+    file_handler = logging.FileHandler(filename=filename, encoding='utf-8', mode='w')
+    file_handler.setFormatter(formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(queue_size)
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(ComponentFilter())
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    for name in HOT_PATH_LOGGERS:
+        logging.getLogger(name).addFilter(RateLimitFilter(error_interval))
+
+    listener = logging.handlers.QueueListener(log_queue, file_handler, console_handler,
+                                              respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,134 @@
+import asyncio
+import heapq
+import time
+from collections import deque
+
+# Event-loop responsiveness monitor.
+# Two measurements:
+#   * scheduling lag: a probe task sleeps `interval` seconds and records how
+#     late it wakes up. Anything that blocks the loop (Qt slots included)
+#     shows up here.
+#   * slow callbacks: asyncio.Handle._run is wrapped to time every callback
+#     the monitored loop runs; the slowest ones are kept with a readable
+#     description.
+#
+# The callback timing depends on private internals: asyncio.Handle._run
+# (patched on the class, so it is process-wide; handles of other loops pass
+# straight through) and qasync dispatching its callbacks through
+# Handle._run. asyncio's own instrumentation (debug mode plus
+# loop.slow_callback_duration) lives in BaseEventLoop._run_once, which
+# qasync does not use, so it misses exactly the Qt-driven callbacks.
+# slow_callback_duration is still set to the same threshold, for loops run in
+# debug mode. If Handle._run ever disappears, only the lag probe runs.
+
+
+def describe_handle(handle):
+    cb = getattr(handle, '_callback', None)
+    owner = getattr(cb, '__self__', None)
+    if isinstance(owner, asyncio.Task):
+        coro = owner.get_coro()
+        name = getattr(coro, '__qualname__', repr(coro))
+        return f"Task {owner.get_name()} ({name})"
+    return getattr(cb, '__qualname__', repr(cb))
+
+
+class LoopLagMonitor:
+    def __init__(self, interval=0.1, slow_callback=0.05, keep_slowest=10, history=3000):
+        self.interval = interval
+        self.slow_callback = slow_callback
+        self.keep_slowest = keep_slowest
+        self.lags = deque(maxlen=history)
+        self.max_lag = 0.0
+        self.samples = 0
+        self.slowest = []  # min-heap of (duration, seq, description)
+        self.slow_count = 0
+        self._seq = 0
+        self._task = None
+        self._loop = None
+        self._orig_run = None
+
+    def start(self, loop=None):
+        loop = loop or asyncio.get_event_loop()
+        self._loop = loop
+        loop.slow_callback_duration = self.slow_callback
+        self._install()
+        self._task = loop.create_task(self._probe())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._uninstall()
+        self._loop = None
+
+    async def _probe(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - t0 - self.interval)
+            self.lags.append(lag)
+            self.samples += 1
+            if lag > self.max_lag:
+                self.max_lag = lag
+
+    def _install(self):
+        if self._orig_run is not None:
+            return
+        orig_run = getattr(asyncio.Handle, '_run', None)
+        if orig_run is None:
+            return
+        monitor = self
+
+        def timed_run(handle):
+            if getattr(handle, '_loop', None) is not monitor._loop:
+                return orig_run(handle)
+            t0 = time.perf_counter()
+            try:
+                return orig_run(handle)
+            finally:
+                dt = time.perf_counter() - t0
+                if dt >= monitor.slow_callback:
+                    monitor._record_slow(dt, handle)
+
+        self._orig_run = orig_run
+        asyncio.Handle._run = timed_run
+
+    def _uninstall(self):
+        if self._orig_run is not None:
+            asyncio.Handle._run = self._orig_run
+            self._orig_run = None
+
+    def _record_slow(self, duration, handle):
+        self.slow_count += 1
+        self._seq += 1
+        entry = (duration, self._seq, describe_handle(handle))
+        if len(self.slowest) < self.keep_slowest:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def summary(self):
+        lags = sorted(self.lags)
+        if lags:
+            p50 = lags[len(lags) // 2]
+            p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+        else:
+            p50 = p99 = 0.0
+        return {
+            'samples': self.samples,
+            'lag_p50_ms': p50 * 1000,
+            'lag_p99_ms': p99 * 1000,
+            'lag_max_ms': self.max_lag * 1000,
+            'slow_callbacks': self.slow_count,
+            'slowest': [(d * 1000, desc) for d, _, desc in sorted(self.slowest, reverse=True)],
+        }
+
+    def report(self):
+        s = self.summary()
+        lines = [f"Event loop lag: p50 {s['lag_p50_ms']:.1f} ms, p99 {s['lag_p99_ms']:.1f} ms, "
+                 f"max {s['lag_max_ms']:.1f} ms over {s['samples']} samples; "
+                 f"{s['slow_callbacks']} callbacks over {self.slow_callback * 1000:.0f} ms"]
+        for ms, desc in s['slowest']:
+            lines.append(f"  {ms:8.1f} ms  {desc}")
+        return "\n".join(lines)
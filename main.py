@@ -6,14 +6,13 @@ from gui import MainWindow
 import logging
 from client import DiscordClient
 from audio import AudioHandler
+from loopmon import LoopLagMonitor
 
-# Setup logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger('discord')
-logger.setLevel(logging.INFO)
-handler = logging.FileHandler(filename='discord.log', encoding='utf-8', mode='w')
-handler.setFormatter(logging.Formatter('%(asctime)s:%(levelname)s:%(name)s: %(message)s'))
-logger.addHandler(handler)
+from logsetup import setup_logging
+
+# Setup logging (queue-based: file and console I/O happen on the listener thread)
+log_listener = setup_logging(filename='discord.log', level=logging.INFO)
+log = logging.getLogger('booster.main')
 
 async def main():
     def close_future(future, loop):
@@ -29,9 +28,21 @@ async def main():
             lambda: close_future(future, loop)
         )
 
+    # Watch event-loop responsiveness (gateway heartbeats and voice traffic share this loop)
+    loop_monitor = LoopLagMonitor()
+    loop_monitor.start(loop)
+
     # Initialize components
     audio_handler = AudioHandler()
     discord_client = DiscordClient(audio_handler)
+
+    # Open and warm up the default input off the loop
+    async def open_default_device():
+        try:
+            await audio_handler.run_blocking(audio_handler.start_stream)
+        except Exception:
+            pass # No default device; read() returns silence until one is chosen
+    asyncio.ensure_future(open_default_device())
     
     window = MainWindow(discord_client, audio_handler)
     window.show()
@@ -46,7 +57,10 @@ async def main():
             await discord_client.leave_channel()
         if not discord_client.is_closed():
             await discord_client.close()
-        audio_handler.cleanup()
+        await audio_handler.run_blocking(audio_handler.close)
+        audio_handler.executor.shutdown(wait=False)
+        loop_monitor.stop()
+        log.info(loop_monitor.report())
 
 if __name__ == "__main__":
     if sys.platform == 'win32':
@@ -69,3 +83,4 @@ if __name__ == "__main__":
                      loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
              except RuntimeError:
                  pass
+             log_listener.stop()
@@ -0,0 +1,72 @@
+import numpy as np
+
+# Level/spectrum snapshot shared between the audio thread and the GUI.
+# The audio thread writes a small per-frame summary (peaks, RMS, clip flag and,
+# every few frames, one mono copy of the output frame) into the back half of a
+# double buffer and then flips `front`. The GUI copies the front half from a
+# QTimer and does the FFT/band work itself, so the audio thread never pays
+# for the spectrum. No locks: a flip is a single attribute store, and the writer only
+# touches the half the reader is not looking at (a reader would need to be
+# stalled for a whole 20ms frame to see a torn read, and that only costs
+# one slightly wrong meter redraw).
+
+IN_PEAK, IN_RMS, OUT_PEAK, OUT_RMS, CLIP = range(5)
+HEADER = 5
+
+
+class MeterSnapshot:
+    def __init__(self, chunk=960, channels=2, rate=48000, bands=48, decimation=2,
+                 f_min=50.0, f_max=20000.0):
+        self.channels = channels
+        self.bands = bands
+        # Spectrum only every `decimation` frames (50 fps audio -> 25 fps spectrum)
+        self.decimation = decimation
+        self.buffers = np.zeros((2, HEADER + chunk), dtype=np.float32)
+        self.front = 0
+        self.seq = 0
+
+        # Precomputed spectrum tables (used on the GUI side)
+        self.window = np.hanning(chunk).astype(np.float32)
+        # Full-scale sine -> 0 dB
+        self.spectrum_scale = 2.0 / (self.window.sum() * 32768.0)
+        freqs = np.fft.rfftfreq(chunk, 1.0 / rate)
+        edges = np.geomspace(f_min, f_max, bands + 1)
+        starts = np.searchsorted(freqs, edges[:-1])
+        # reduceat needs in-range, non-decreasing starts; empty low bands reuse the next bin
+        self.band_starts = np.minimum(np.maximum.accumulate(starts), len(freqs) - 1)
+
+    def publish(self, audio_in, audio_out):
+        """
+        Audio thread. audio_in / audio_out: interleaved float32 frames in int16 scale,
+        audio_out taken before the final clip.
+        """
+        back = 1 - self.front
+        buf = self.buffers[back]
+
+        out_peak = np.abs(audio_out).max()
+        buf[IN_PEAK] = np.abs(audio_in).max() / 32768.0
+        buf[IN_RMS] = np.sqrt(np.dot(audio_in, audio_in) / audio_in.size) / 32768.0
+        buf[OUT_PEAK] = min(out_peak / 32768.0, 1.0)
+        buf[OUT_RMS] = min(np.sqrt(np.dot(audio_out, audio_out) / audio_out.size) / 32768.0, 1.0)
+        buf[CLIP] = 1.0 if out_peak >= 32767.0 else 0.0
+
+        if self.seq % self.decimation == 0:
+            frame = audio_out.reshape(-1, self.channels)
+            np.add(frame[:, 0], frame[:, -1], out=buf[HEADER:])
+        else:
+            buf[HEADER:] = self.buffers[self.front, HEADER:]
+
+        self.front = back
+        self.seq += 1
+
+    def read(self):
+        """GUI thread. Returns (seq, copy of the latest summary)."""
+        seq = self.seq
+        return seq, self.buffers[self.front].copy()
+
+    def spectrum(self, snapshot):
+        """GUI thread. Band levels in dBFS (length `bands`) from a snapshot returned by read()."""
+        mono = snapshot[HEADER:] * 0.5
+        mag = np.abs(np.fft.rfft(mono * self.window)) * self.spectrum_scale
+        band_mag = np.maximum.reduceat(mag, self.band_starts)
+        return 20.0 * np.log10(band_mag + 1e-6)
@@ -0,0 +1,179 @@
+import threading
+import numpy as np
+
+# Secondary capture sources (music, loopback, ...) mixed into the mic stream.
+# The mic stays the master clock: AudioHandler.read() blocks on it once per
+# 20ms frame. Every extra source runs in PortAudio callback mode and fills its
+# own ring buffer; read() pulls exactly one frame from each ring and corrects
+# clock drift per source by consuming one sample more or less per frame.
+
+
+class RingBuffer:
+    """
+    Fixed-size float32 ring of (frames, channels).
+    One producer (PortAudio callback thread), one consumer (audio read thread).
+    On overflow the oldest samples are dropped.
+    """
+    def __init__(self, capacity, channels):
+        self.capacity = capacity
+        self.channels = channels
+        self.buffer = np.zeros((capacity, channels), dtype=np.float32)
+        self.write_pos = 0  # total frames ever written
+        self.read_pos = 0   # total frames ever read
+        self.overflows = 0
+        self.lock = threading.Lock()
+
+    def available(self):
+        return self.write_pos - self.read_pos
+
+    def write(self, block):
+        n = block.shape[0]
+        if n > self.capacity:
+            block = block[-self.capacity:]
+            n = self.capacity
+        with self.lock:
+            start = self.write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self.buffer[start:start + first] = block[:first]
+            self.buffer[:n - first] = block[first:]
+            self.write_pos += n
+            if self.write_pos - self.read_pos > self.capacity:
+                self.read_pos = self.write_pos - self.capacity
+                self.overflows += 1
+
+    def read(self, n):
+        """Read up to n frames. Returns an array of shape (<=n, channels)."""
+        with self.lock:
+            n = min(n, self.write_pos - self.read_pos)
+            start = self.read_pos % self.capacity
+            idx = (start + np.arange(n)) % self.capacity
+            out = self.buffer[idx]
+            self.read_pos += n
+        return out
+
+
+class AuxSource:
+    """
+    A secondary input device opened in callback mode alongside the mic.
+    pull() always returns exactly one frame, shape (chunk, channels).
+    """
+    def __init__(self, p, device_index, rate=48000, channels=2, chunk=960, latency_frames=3):
+        self.device_index = device_index
+        self.channels = channels
+        self.chunk = chunk
+        self.target_fill = chunk * latency_frames
+        # Allowed deviation from target fill before drift correction kicks in
+        self.tolerance = chunk // 2
+        self.ring = RingBuffer(chunk * latency_frames * 4, channels)
+        self.primed = False
+        self.underruns = 0
+        self.drift_corrections = 0
+
+        # PortAudio only for live capture: RingBuffer/Ducker also run offline (bench.py)
+        import pyaudio
+        self.CONTINUE = pyaudio.paContinue
+
+        device_channels = int(p.get_device_info_by_index(device_index).get('maxInputChannels', channels))
+        self.device_channels = max(1, min(channels, device_channels))
+
+        self.stream = p.open(format=pyaudio.paInt16,
+                             channels=self.device_channels,
+                             rate=rate,
+                             input=True,
+                             input_device_index=device_index,
+                             frames_per_buffer=chunk,
+                             stream_callback=self._callback)
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        block = np.frombuffer(in_data, dtype=np.int16).astype(np.float32)
+        block = block.reshape(-1, self.device_channels)
+        if self.device_channels != self.channels:
+            block = np.repeat(block[:, :1], self.channels, axis=1)
+        self.ring.write(block)
+        return (None, self.CONTINUE)
+
+    def _resample(self, block, n):
+        """Linear resample of block (m, C) to exactly n frames."""
+        m = block.shape[0]
+        pos = np.arange(n) * ((m - 1) / (n - 1))
+        i0 = np.minimum(pos.astype(np.intp), m - 2)
+        frac = (pos - i0)[:, np.newaxis].astype(np.float32)
+        return block[i0] * (1.0 - frac) + block[i0 + 1] * frac
+
+    def pull(self):
+        n = self.chunk
+        fill = self.ring.available()
+
+        # Wait until the ring holds the target latency before producing audio
+        if not self.primed:
+            if fill < self.target_fill:
+                return np.zeros((n, self.channels), dtype=np.float32)
+            self.primed = True
+
+        if fill < n:
+            # Underrun: play what we have and re-prime
+            self.underruns += 1
+            self.primed = False
+            block = self.ring.read(fill)
+            out = np.zeros((n, self.channels), dtype=np.float32)
+            out[:block.shape[0]] = block
+            return out
+
+        # Drift: device clock running fast -> eat one extra sample, slow -> one less
+        error = fill - self.target_fill
+        if error > self.tolerance:
+            self.drift_corrections += 1
+            block = self._resample(self.ring.read(n + 1), n)
+        elif error < -self.tolerance:
+            self.drift_corrections += 1
+            block = self._resample(self.ring.read(n - 1), n)
+        else:
+            block = self.ring.read(n)
+        return block
+
+    def close(self):
+        try:
+            self.stream.stop_stream()
+            self.stream.close()
+        except Exception:
+            pass
+
+
+class Ducker:
+    """
+    Lowers secondary sources while the mic is active.
+    Works at frame rate: one level measurement per frame, and the gain change
+    is spread over the frame as a linear ramp to avoid zipper noise.
+    """
+    def __init__(self, threshold_db=-40.0, depth_db=-12.0, hold_frames=15, release_frames=10):
+        self.enabled = True
+        self.threshold_db = threshold_db
+        self.depth_db = depth_db
+        self.hold_frames = hold_frames        # 300ms hold after speech stops
+        self.release_frames = release_frames  # 200ms back to full level
+        self.current_gain = 1.0
+        self.hold = 0
+
+    def process(self, mic_block, aux_block):
+        """mic_block: raw mic frame (N, C). aux_block: mixed secondary frame (N, C)."""
+        if not self.enabled:
+            target = 1.0
+        else:
+            rms = np.sqrt(np.mean(np.square(mic_block, dtype=np.float32)))
+            level_db = 20 * np.log10(rms / 32768.0 + 1e-9)
+            if level_db > self.threshold_db:
+                self.hold = self.hold_frames
+            elif self.hold > 0:
+                self.hold -= 1
+            target = 10 ** (self.depth_db / 20.0) if self.hold > 0 else 1.0
+
+        if target < self.current_gain:
+            new_gain = target  # attack within one frame
+        else:
+            new_gain = min(target, self.current_gain + 1.0 / self.release_frames)
+
+        if new_gain == self.current_gain == 1.0:
+            return aux_block
+        ramp = np.linspace(self.current_gain, new_gain, aux_block.shape[0], dtype=np.float32)
+        self.current_gain = new_gain
+        return aux_block * ramp[:, np.newaxis]
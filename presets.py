@@ -0,0 +1,137 @@
+import os
+import json
+import logging
+from dsp import DSPChain
+
+log = logging.getLogger("booster.presets")
+
+# Named effect presets.
+# A preset is a plain settings dict (the format AudioHandler.get_settings()
+# returns), stored in presets.json. Every preset is compiled to a DSPChain
+# (filter coefficients, pitch tables) as soon as it is loaded or saved, so
+# switching is only a pointer swap plus a one-frame crossfade on the audio
+# thread.
+
+PRESETS_FILE = 'presets.json'
+
+DEFAULT_SETTINGS = {
+    'gain_db': 0.0,
+    'pitch': 1.0,
+    'eq': [0, 0, 0],
+    'modulation': {},
+}
+
+BUILTIN_PRESETS = {
+    'Default': DEFAULT_SETTINGS,
+    'Deep Voice': {'gain_db': 3.0, 'pitch': 0.75, 'eq': [6, 0, -4], 'modulation': {}},
+    'Chipmunk': {'gain_db': 0.0, 'pitch': 1.6, 'eq': [-6, 0, 3], 'modulation': {}},
+    'Radio': {'gain_db': 6.0, 'pitch': 1.0, 'eq': [-20, 8, -20], 'modulation': {}},
+    'Choir': {'gain_db': 0.0, 'pitch': 1.0, 'eq': [0, 0, 2],
+              'modulation': {'chorus': {'enabled': True, 'rate': 0.6, 'depth': 0.7, 'mix': 0.5}}},
+    'Wobble': {'gain_db': 0.0, 'pitch': 1.0, 'eq': [0, 0, 0],
+               'modulation': {'vibrato': {'enabled': True, 'rate': 6.0, 'depth': 0.5},
+                              'tremolo': {'enabled': True, 'rate': 6.0, 'depth': 0.4}}},
+}
+
+MODULATION_NAMES = ('chorus', 'flanger', 'vibrato', 'tremolo')
+MODULATION_PARAMS = ('rate', 'depth', 'mix', 'spread')
+
+
+def normalize_settings(settings):
+    """Fill in defaults; every effect not mentioned is switched off."""
+    out = dict(DEFAULT_SETTINGS)
+    out.update(settings)
+    out['gain_db'] = float(out['gain_db'])
+    out['pitch'] = max(0.1, min(4.0, float(out['pitch'])))
+    out['eq'] = [float(v) for v in out['eq']]
+    if len(out['eq']) != 3:
+        raise ValueError(f"eq needs 3 values (low, mid, high), got {len(out['eq'])}")
+    modulation = {}
+    for name in MODULATION_NAMES:
+        given = out['modulation'].get(name, {})
+        params = {k: float(v) for k, v in given.items() if k in MODULATION_PARAMS}
+        params['enabled'] = bool(given.get('enabled', False))
+        modulation[name] = params
+    out['modulation'] = modulation
+    return out
+
+
+def compile_settings(settings, chunk=960, channels=2, rate=48000):
+    settings = normalize_settings(settings)
+    return DSPChain(gain=10 ** (settings['gain_db'] / 20.0),
+                    pitch_factor=settings['pitch'],
+                    eq_db=settings['eq'],
+                    chunk=chunk, channels=channels, rate=rate,
+                    modulation=settings['modulation'])
+
+
+class PresetStore:
+    def __init__(self, path=PRESETS_FILE, chunk=960, channels=2, rate=48000):
+        self.path = path
+        self.chunk = chunk
+        self.channels = channels
+        self.rate = rate
+        self.presets = {}
+        self.compiled = {}
+        self.deleted = set()  # built-ins the user deleted
+
+    def load(self):
+        """Built-in presets (minus deleted ones), overridden/extended by the ones on disk."""
+        presets = {name: dict(settings) for name, settings in BUILTIN_PRESETS.items()}
+        self.deleted = set()
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.deleted = set(data.get('deleted', [])) & set(BUILTIN_PRESETS)
+                for name in self.deleted:
+                    del presets[name]
+                presets.update(data.get('presets', {}))
+            except (OSError, ValueError) as e:
+                log.warning("failed to read presets: %s", e, extra={'path': self.path})
+
+        self.presets = {}
+        self.compiled = {}
+        for name, settings in presets.items():
+            try:
+                self._put(name, settings)
+            except Exception as e:
+                log.warning("skipping invalid preset %r: %s", name, e)
+        log.info("presets loaded", extra={'count': len(self.presets)})
+        return self
+
+    def save(self):
+        # Built-ins are only written when they were changed, or listed as deleted
+        user = {name: s for name, s in self.presets.items()
+                if name not in BUILTIN_PRESETS or normalize_settings(BUILTIN_PRESETS[name]) != s}
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'presets': user, 'deleted': sorted(self.deleted)}, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def _put(self, name, settings):
+        settings = normalize_settings(settings)
+        self.compiled[name] = compile_settings(settings, self.chunk, self.channels, self.rate)
+        self.presets[name] = settings
+        self.deleted.discard(name)
+
+    def put(self, name, settings):
+        """Add or replace a preset, compile it and write the file."""
+        self._put(name, settings)
+        self.save()
+
+    def delete(self, name):
+        self.presets.pop(name, None)
+        self.compiled.pop(name, None)
+        if name in BUILTIN_PRESETS:
+            self.deleted.add(name)
+        self.save()
+
+    def names(self):
+        return list(self.presets)
+
+    def get(self, name):
+        return self.presets[name]
+
+    def chain(self, name):
+        return self.compiled[name]
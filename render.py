@@ -0,0 +1,221 @@
+"""
+Offline batch renderer: runs WAV files through the live effect chain.
+
+Uses the same DSPChain and modulation effects as AudioHandler.read(), in the
+same order (pitch -> EQ -> gain -> modulation -> clip) and on the same 20ms
+frames, so a render sounds exactly like going live (at full quality; the CPU
+governor and the secondary input are not involved). Input is memory-mapped and
+processed many seconds at a time, and every (file, settings) pair is a
+separate job on a process pool.
+
+    python render.py voice.wav                         # Default preset
+    python render.py *.wav -p "Deep Voice" -p Radio    # several presets per file
+    python render.py voice.wav -s '{"pitch": 1.2, "eq": [0, 3, 0]}'
+    python render.py voice.wav -s my_settings.json -o out -j 4
+
+Input: 16-bit PCM WAV, 48 kHz, mono or stereo (mono is duplicated to stereo).
+Output: <out-dir>/<file>__<settings>.wav, 48 kHz stereo 16-bit.
+"""
+import os
+import sys
+import json
+import time
+import wave
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+from effects import Chorus, Flanger, Vibrato, Tremolo
+from presets import PresetStore, compile_settings, normalize_settings
+
+RATE = 48000
+CHANNELS = 2
+CHUNK = 960
+FRAME_SECONDS = CHUNK / RATE
+
+# Same order as AudioHandler.modulation_chain
+MODULATION_ORDER = (('vibrato', Vibrato), ('chorus', Chorus), ('flanger', Flanger), ('tremolo', Tremolo))
+
+
+def open_wav(path):
+    """
+    Memory-map the sample data of a 16-bit PCM WAV file.
+    Returns (samples shaped (n, channels), sample rate).
+    """
+    with open(path, 'rb') as f:
+        riff, _, wave_id = struct.unpack('<4sI4s', f.read(12))
+        if riff != b'RIFF' or wave_id != b'WAVE':
+            raise ValueError(f"{path}: not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path}: no data chunk")
+            chunk_id, size = struct.unpack('<4sI', header)
+            if chunk_id == b'fmt ':
+                fmt = struct.unpack('<HHIIHH', f.read(16))
+                f.seek(size - 16 + (size & 1), os.SEEK_CUR)
+            elif chunk_id == b'data':
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR) # chunks are word-aligned
+
+    if fmt is None:
+        raise ValueError(f"{path}: no fmt chunk")
+    format_tag, channels, rate, _, _, bits = fmt
+    # 1 = PCM, 0xFFFE = WAVE_FORMAT_EXTENSIBLE (PCM subformat assumed)
+    if format_tag not in (1, 0xFFFE) or bits != 16:
+        raise ValueError(f"{path}: only 16-bit PCM is supported")
+    if channels not in (1, 2):
+        raise ValueError(f"{path}: {channels} channels (mono or stereo only)")
+
+    # Truncated files report more data than they hold
+    n = min(size, os.path.getsize(path) - offset) // (2 * channels)
+    samples = np.memmap(path, dtype='<i2', mode='r', offset=offset, shape=(n, channels))
+    return samples, rate
+
+
+def build_modulation(modulation):
+    """Enabled modulation effects for a settings dict, in live chain order."""
+    chain = []
+    for name, cls in MODULATION_ORDER:
+        params = dict(modulation.get(name, {}))
+        if not params.pop('enabled', False):
+            continue
+        fx = cls(fs=RATE, channels=CHANNELS)
+        # Same limits as AudioHandler.set_modulation
+        for key, value in params.items():
+            if key == 'rate':
+                value = max(0.01, min(20.0, float(value)))
+            else:
+                value = max(0.0, min(1.0, float(value)))
+            setattr(fx, key, value)
+        fx.enabled = True
+        chain.append(fx)
+    return chain
+
+
+def render_file(in_path, out_path, settings, chunk_seconds=30.0):
+    """
+    Process one file with one settings dict (runs in a worker process).
+    Returns (seconds of audio, seconds of wall time).
+    """
+    start = time.perf_counter()
+    samples, rate = open_wav(in_path)
+    if rate != RATE:
+        raise ValueError(f"{in_path}: {rate} Hz input, resample to {RATE} Hz first")
+
+    chain = compile_settings(settings, chunk=CHUNK, channels=CHANNELS, rate=RATE)
+    modulation = build_modulation(chain.modulation)
+
+    frames_per_chunk = max(1, int(chunk_seconds / FRAME_SECONDS))
+    step = frames_per_chunk * CHUNK
+    total = samples.shape[0]
+
+    with wave.open(out_path, 'wb') as out:
+        out.setnchannels(CHANNELS)
+        out.setsampwidth(2)
+        out.setframerate(RATE)
+        for pos in range(0, total, step):
+            block = samples[pos:pos + step].astype(np.float32)
+            if block.shape[1] == 1:
+                block = np.repeat(block, CHANNELS, axis=1)
+            n = block.shape[0]
+            # Last frame is zero-padded to a whole 20ms frame, then trimmed
+            n_frames = -(-n // CHUNK)
+            if n_frames * CHUNK != n:
+                block = np.concatenate((block, np.zeros((n_frames * CHUNK - n, CHANNELS), np.float32)))
+
+            # 1-3. Pitch, EQ, Gain: every 20ms frame processed on its own, all at once
+            audio_data = chain.process(block.reshape(n_frames, CHUNK * CHANNELS))
+            # 4. Modulation: block-size independent, so one call per chunk
+            audio_data = audio_data.reshape(-1, CHANNELS)
+            for fx in modulation:
+                audio_data = fx.process(audio_data)
+
+            audio_data = np.clip(audio_data[:n], -32768, 32767)
+            out.writeframes(audio_data.astype('<i2').tobytes())
+
+    return total / RATE, time.perf_counter() - start
+
+
+def load_settings(args, store):
+    """[(label, settings dict)] from --preset and --settings, Default if neither is given."""
+    sets = []
+    for name in args.preset:
+        if name not in store.presets:
+            raise SystemExit(f"unknown preset {name!r} (have: {', '.join(store.names())})")
+        sets.append((name, store.get(name)))
+    for i, spec in enumerate(args.settings, 1):
+        if os.path.exists(spec):
+            with open(spec, 'r', encoding='utf-8') as f:
+                settings = json.load(f)
+            label = os.path.splitext(os.path.basename(spec))[0]
+        else:
+            settings = json.loads(spec)
+            label = f"settings{i}"
+        try:
+            sets.append((label, normalize_settings(settings)))
+        except (TypeError, ValueError) as e:
+            raise SystemExit(f"invalid settings {spec!r}: {e}")
+    return sets or [('Default', store.get('Default'))]
+
+
+def safe_label(label):
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in label)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('inputs', nargs='+', help="16-bit PCM WAV files (48 kHz)")
+    parser.add_argument('-p', '--preset', action='append', default=[],
+                        help="preset name (repeatable); built-in or from presets.json")
+    parser.add_argument('-s', '--settings', action='append', default=[],
+                        help="settings JSON, inline or a file path (repeatable)")
+    parser.add_argument('-o', '--out-dir', default='renders')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-seconds', type=float, default=30.0,
+                        help="audio processed per memory-mapped read")
+    args = parser.parse_args(argv)
+
+    store = PresetStore(chunk=CHUNK, channels=CHANNELS, rate=RATE).load()
+    settings_sets = load_settings(args, store)
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    jobs = []
+    for in_path in args.inputs:
+        stem = os.path.splitext(os.path.basename(in_path))[0]
+        for label, settings in settings_sets:
+            out_path = os.path.join(args.out_dir, f"{stem}__{safe_label(label)}.wav")
+            jobs.append((in_path, label, out_path, settings))
+
+    print(f"{len(jobs)} renders ({len(args.inputs)} files x {len(settings_sets)} settings) "
+          f"on {args.jobs} processes")
+    failed = 0
+    audio_total = 0.0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {pool.submit(render_file, in_path, out_path, settings, args.chunk_seconds):
+                   (in_path, label, out_path)
+                   for in_path, label, out_path, settings in jobs}
+        for future in as_completed(futures):
+            in_path, label, out_path = futures[future]
+            try:
+                audio_s, wall_s = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"  FAILED {in_path} [{label}]: {e}")
+                continue
+            audio_total += audio_s
+            print(f"  {out_path}  {audio_s:8.1f} s audio  {audio_s / max(wall_s, 1e-9):7.1f}x real time")
+
+    elapsed = time.perf_counter() - start
+    print(f"Total: {audio_total:.1f} s of audio in {elapsed:.2f} s "
+          f"({audio_total / max(elapsed, 1e-9):.1f}x real time)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
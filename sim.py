@@ -0,0 +1,551 @@
+"""
+Offline end-to-end simulation of the voice-send path.
+
+Runs AudioHandler against a fake, clock-driven PyAudio and a stand-in for
+discord.py's 20ms AudioPlayer loop, all on a virtual clock, so no sound card,
+Discord account or real-time waiting is needed. Devices can inject timing
+jitter, clock drift and xruns (buffer overflows).
+
+Per scenario it reports capture-to-send latency, late frames, overflows and
+silent frames, checks them against the scenario's limits, and compares the
+sent audio against a golden render in golden/. Exits 1 if anything fails.
+
+    python sim.py                      # run all scenarios, check goldens
+    python sim.py pitch_eq xruns       # run some scenarios
+    python sim.py --update-golden      # re-render goldens after an intended DSP change
+"""
+import os
+import time
+import sys
+import types
+import argparse
+from unittest import mock
+import numpy as np
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden")
+RATE = 48000
+CHANNELS = 2
+CHUNK = 960
+FRAME_SECONDS = CHUNK / RATE
+
+
+class SimClock:
+    """
+    Virtual time. Devices register here and are pumped whenever time advances.
+    Exposes the subset of the `time` module AudioHandler uses, so it can be
+    patched in as `audio.time`. perf_counter() is only used to time processing,
+    so it stays real CPU time (scaled by cpu_scale) for the overload governor.
+    """
+    def __init__(self, cpu_scale=1.0):
+        self.now = 0.0
+        self.devices = []
+        self.cpu_scale = cpu_scale
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return time.perf_counter() * self.cpu_scale
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.advance_to(self.now + max(0.0, seconds))
+
+    def advance_to(self, t):
+        # Deliver every device period that arrives before t, in arrival order
+        while True:
+            pending = [(d.next_arrival(), i, d) for i, d in enumerate(self.devices) if d.running]
+            if not pending:
+                break
+            arrival, _, device = min(pending)
+            if arrival > t:
+                break
+            self.now = max(self.now, arrival)
+            device.deliver()
+        self.now = max(self.now, t)
+
+
+class FakeDevice:
+    """
+    A capture device producing `signal` (frames, channels int16, looped).
+    Audio is captured in hardware periods; each period becomes readable at its
+    capture time plus latency and random jitter.
+
+    drift_ppm: device clock error (+ = runs fast).
+    jitter_ms: max extra delivery delay per period (uniform, seeded).
+    xruns: virtual times at which the device overflows and loses xrun_ms of audio.
+    """
+    def __init__(self, name, signal, period=480, buffer_periods=8, drift_ppm=0.0,
+                 jitter_ms=0.0, latency_ms=1.0, xruns=(), xrun_ms=60.0, start_offset_ms=0.0, seed=0):
+        self.name = name
+        self.signal = signal
+        self.channels = signal.shape[1]
+        self.period = period
+        self.capacity = period * buffer_periods
+        self.rate = RATE * (1.0 + drift_ppm * 1e-6)
+        self.jitter = jitter_ms / 1000.0
+        self.latency = latency_ms / 1000.0
+        self.xruns = sorted(xruns)
+        self.xrun_frames = int(RATE * xrun_ms / 1000.0)
+        self.start_offset = start_offset_ms / 1000.0
+        self.rng = np.random.default_rng(seed)
+        self.running = False
+        self.stream = None
+
+    def start(self, clock, stream):
+        self.clock = clock
+        self.stream = stream
+        self.start_time = clock.now + self.start_offset
+        self.produced = 0          # frames captured so far
+        self.lost = 0              # signal frames skipped by xruns
+        self.buffer = []           # list of (first_frame_index, block)
+        self.available = 0
+        self.overflows = 0
+        self._next_jitter = self.rng.uniform(0, self.jitter) if self.jitter else 0.0
+        self.running = True
+        if self not in clock.devices:
+            clock.devices.append(self)
+
+    def stop(self):
+        self.running = False
+        if self in self.clock.devices:
+            self.clock.devices.remove(self)
+
+    def capture_time(self, frame_index):
+        return self.start_time + frame_index / self.rate
+
+    def next_arrival(self):
+        return self.capture_time(self.produced + self.period) + self.latency + self._next_jitter
+
+    def deliver(self):
+        n = self.period
+        idx = (self.produced + self.lost + np.arange(n)) % len(self.signal)
+        block = self.signal[idx]
+        first = self.produced
+        self.produced += n
+        self._next_jitter = self.rng.uniform(0, self.jitter) if self.jitter else 0.0
+
+        # Injected xrun: buffered audio plus xrun_ms of signal are lost,
+        # the device clock keeps running
+        while self.xruns and self.xruns[0] <= self.clock.now:
+            self.xruns.pop(0)
+            self.overflows += 1
+            self.buffer.clear()
+            self.available = 0
+            self.lost += self.xrun_frames
+            return
+
+        if self.stream.callback is not None:
+            self.stream.callback(block.astype(np.int16).tobytes(), n, None, 0)
+            return
+
+        self.buffer.append((first, block))
+        self.available += n
+        # Natural overflow: reader too slow, oldest audio is dropped
+        while self.available > self.capacity:
+            _, dropped = self.buffer.pop(0)
+            self.available -= len(dropped)
+            self.overflows += 1
+
+    def take(self, n):
+        """Remove n frames from the buffer; returns (block, capture time of first frame)."""
+        first_time = self.capture_time(self.buffer[0][0])
+        out = []
+        need = n
+        while need:
+            first, block = self.buffer[0]
+            part = block[:need]
+            out.append(part)
+            need -= len(part)
+            if len(part) == len(block):
+                self.buffer.pop(0)
+            else:
+                self.buffer[0] = (first + len(part), block[len(part):])
+        self.available -= n
+        return np.concatenate(out), first_time
+
+
+class FakeStream:
+    def __init__(self, device, clock, frames_per_buffer, stream_callback=None):
+        self.device = device
+        self.clock = clock
+        self.frames_per_buffer = frames_per_buffer
+        self.callback = stream_callback
+        self.active = True
+        self.last_capture_time = None
+        device.start(clock, self)
+
+    def read(self, n, exception_on_overflow=True):
+        # Block (in virtual time) until the device has delivered n frames
+        self.clock.advance_to(self.clock.now)
+        while self.device.available < n:
+            self.clock.advance_to(self.device.next_arrival())
+        block, self.last_capture_time = self.device.take(n)
+        return block.astype(np.int16).tobytes()
+
+    def get_read_available(self):
+        self.clock.advance_to(self.clock.now) # everything that has arrived by now
+        return self.device.available
+
+    def is_active(self):
+        return self.active
+
+    def stop_stream(self):
+        self.active = False
+        self.device.stop()
+
+    def close(self):
+        self.active = False
+
+
+class FakePyAudio:
+    """Stand-in for pyaudio.PyAudio over a fixed list of FakeDevices."""
+    devices = []
+    clock = None
+
+    def __init__(self):
+        self.streams = []
+
+    def open(self, format=None, channels=2, rate=RATE, input=True, input_device_index=None,
+             frames_per_buffer=CHUNK, stream_callback=None):
+        index = 0 if input_device_index is None else input_device_index
+        if index >= len(self.devices):
+            raise OSError(f"[Errno -9996] Invalid input device {index}")
+        device = self.devices[index]
+        if channels != device.channels or rate != RATE:
+            raise OSError("[Errno -9997] Invalid sample rate or channel count")
+        stream = FakeStream(device, self.clock, frames_per_buffer, stream_callback)
+        self.streams.append(stream)
+        return stream
+
+    def get_host_api_info_by_index(self, index):
+        return {'deviceCount': len(self.devices)}
+
+    def get_device_info_by_host_api_device_index(self, api, index):
+        return self.get_device_info_by_index(index)
+
+    def get_device_info_by_index(self, index):
+        d = self.devices[index]
+        return {'index': index, 'name': d.name, 'maxInputChannels': d.channels,
+                'defaultSampleRate': float(RATE)}
+
+    def terminate(self):
+        pass
+
+
+def _ensure_pyaudio():
+    """The simulation must run without PortAudio; provide a module if PyAudio is missing."""
+    try:
+        import pyaudio
+    except ImportError:
+        pyaudio = types.ModuleType("pyaudio")
+        pyaudio.paInt16 = 8
+        pyaudio.paContinue = 0
+        pyaudio.PyAudio = FakePyAudio
+        sys.modules["pyaudio"] = pyaudio
+    return pyaudio
+
+
+pyaudio = _ensure_pyaudio()
+import audio  # noqa: E402  (needs pyaudio resolved first)
+from presets import BUILTIN_PRESETS, compile_settings  # noqa: E402
+
+
+class SimPlayer:
+    """
+    Stand-in for discord.py's AudioPlayer thread: pulls one frame every 20ms
+    with the same drift-compensating schedule, on the virtual clock.
+    CPU time spent in read() is measured for real and charged to the clock
+    (scaled by cpu_scale to emulate a slower machine).
+    events: {frame number: fn(source)}, called just before that frame is read.
+    """
+    DELAY = FRAME_SECONDS
+
+    def __init__(self, source, clock, cpu_scale=1.0, send_cost_ms=0.2, events=None):
+        self.source = source
+        self.events = events or {}
+        self.clock = clock
+        self.cpu_scale = cpu_scale
+        self.send_cost = send_cost_ms / 1000.0
+        self.frames = []
+        self.latencies = []
+        self.late_frames = 0
+        self.silent_frames = 0
+        self.read_cpu = []
+
+    def run(self, n_frames):
+        import time as real_time
+        start = self.clock.now
+        for loops in range(1, n_frames + 1):
+            if loops in self.events:
+                self.events[loops](self.source)
+            t0 = real_time.perf_counter()
+            data = self.source.read()
+            cpu = real_time.perf_counter() - t0
+            self.read_cpu.append(cpu)
+            self.clock.advance_to(self.clock.now + cpu * self.cpu_scale + self.send_cost)
+
+            frame = np.frombuffer(data, dtype=np.int16)
+            self.frames.append(frame)
+            stream = self.source.stream
+            capture = getattr(stream, 'last_capture_time', None)
+            if not frame.any():
+                self.silent_frames += 1
+            elif capture is not None:
+                self.latencies.append(self.clock.now - capture)
+
+            next_time = start + self.DELAY * loops
+            delay = max(0.0, self.DELAY + (next_time - self.clock.now))
+            if delay == 0.0:
+                self.late_frames += 1
+            self.clock.sleep(delay)
+        return np.concatenate(self.frames)
+
+
+def make_voice_signal(seconds=2.0, seed=1):
+    """Deterministic speech-like test signal: gliding harmonics, syllable envelope, noise."""
+    n = int(seconds * RATE)
+    t = np.arange(n) / RATE
+    rng = np.random.default_rng(seed)
+    f0 = 140.0 + 30.0 * np.sin(2 * np.pi * 0.7 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / RATE
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    envelope = 0.5 + 0.5 * np.sin(2 * np.pi * 3.0 * t) ** 2
+    mono = 6000.0 * voice * envelope + 200.0 * rng.standard_normal(n)
+    stereo = np.stack([mono, 0.9 * mono], axis=1)
+    return np.clip(stereo, -32768, 32767).astype(np.int16)
+
+
+def make_music_signal(seconds=2.0):
+    n = int(seconds * RATE)
+    t = np.arange(n) / RATE
+    chord = sum(np.sin(2 * np.pi * f * t) for f in (220.0, 277.18, 329.63))
+    left = 3000.0 * chord
+    right = 3000.0 * np.roll(chord, 240)
+    return np.stack([left, right], axis=1).astype(np.int16)
+
+
+def make_tone_signal(seconds=2.0, freq=200.0):
+    """Pure tone: any click stands out against its small sample-to-sample steps."""
+    t = np.arange(int(seconds * RATE)) / RATE
+    mono = 8000.0 * np.sin(2 * np.pi * freq * t)
+    return np.stack([mono, mono], axis=1).astype(np.int16)
+
+
+def _settings_pitch_eq(h):
+    h.set_gain(10 ** (6 / 20.0))
+    h.set_pitch(0.8)
+    h.set_eq(6, -3, 4)
+
+
+def _settings_modulation(h):
+    h.set_modulation('chorus', True)
+    h.set_modulation('tremolo', True, rate=4.0, depth=0.4)
+
+
+def _settings_overload(h):
+    _settings_pitch_eq(h)
+    # Every frame is over budget (set_budget() clamps to 0.1 ms, which mono frames can beat)
+    h.governor.budget = 1e-6
+
+
+def _switch_device(h):
+    h.start_stream(2)
+
+
+def _open_missing_device(h):
+    try:
+        h.start_stream(7)
+    except OSError:
+        return
+    raise AssertionError("opening a missing device did not raise")
+
+
+def _settings_device_switch(h):
+    # Gapless switch to the second mic, then a failed open that must leave it running
+    return {20: _switch_device, 35: _open_missing_device}
+
+
+def _settings_preset_switch(h):
+    wobble = BUILTIN_PRESETS['Wobble']
+    slow_vibrato = dict(wobble, modulation={'vibrato': {'enabled': True, 'rate': 1.0, 'depth': 0.1}})
+    h.apply_chain(compile_settings(wobble))
+    # Effects switched off and on by presets, changed parameters, and switched directly
+    return {15: lambda h: h.apply_chain(compile_settings(BUILTIN_PRESETS['Default'])),
+            25: lambda h: h.apply_chain(compile_settings(wobble)),
+            35: lambda h: h.apply_chain(compile_settings(slow_vibrato)),
+            42: lambda h: h.set_modulation('vibrato', False)}
+
+
+def _settings_aux(h):
+    h.start_aux_stream(1)
+    h.set_aux_gain(0.8)
+
+
+# Pass/fail limits; scenarios override single entries. None = not checked.
+DEFAULT_CHECKS = {
+    'atol': 2,               # LSB against the golden (FFT rounding differs across builds)
+    'max_late': 0,           # frames the player sent behind its schedule
+    'max_overflows': 0,
+    'max_silent': 0,
+    'max_latency_ms': 30.0,  # capture-to-send, one 20ms frame plus device latency/jitter
+    'quality': 0,            # governor level at the end
+    'device': 'Sim Mic',     # input device at the end
+    'max_step': None,        # largest sample-to-sample step (LSB), catches clicks
+}
+
+# name -> (mic device kwargs, settings function, golden name or None, check overrides)
+SCENARIOS = {
+    'clean': ({}, None, 'clean', {}),
+    'pitch_eq': ({}, _settings_pitch_eq, 'pitch_eq', {}),
+    'modulation': ({}, _settings_modulation, 'modulation', {}),
+    'aux_ducking': ({}, _settings_aux, 'aux_ducking', {}),
+    # Timing faults that must not change a single sample
+    'jitter_drift': ({'jitter_ms': 4.0, 'drift_ppm': 300.0}, None, 'clean', {'atol': 0}),
+    # Lost audio: exactly the injected overflows, latency back to one frame.
+    # The player waits for the lost audio once and discord.py never re-bases its
+    # schedule, so every later frame counts as late while still going out every
+    # 20ms; lateness is not checked here.
+    'xruns': ({'xruns': (0.3, 0.31, 0.9)}, None, None, {'max_overflows': 3, 'max_late': None}),
+    # CPU governor must step all the way down without late or silent frames
+    'overload': ({}, _settings_overload, None, {'quality': 3}),
+    # Mid-stream device switch: crossfade, no late or silent frames. The second
+    # mic's 10ms periods are not aligned with the player, so up to one more
+    # period is buffered after the switch.
+    'device_switch': ({}, _settings_device_switch, 'device_switch',
+                      {'device': 'Sim Mic 2', 'max_latency_ms': 32.0}),
+    # Preset and effect switches on a tone must not click: the tone steps by up
+    # to 210 LSB per sample, vibrato's pitch swing adds a little
+    'preset_switch': ({'signal': make_tone_signal()}, _settings_preset_switch, None,
+                      {'max_step': 250}),
+}
+
+
+def run_scenario(name, seconds=1.0, cpu_scale=1.0):
+    device_kwargs, settings, golden, checks = SCENARIOS[name]
+    clock = SimClock(cpu_scale)
+    device_kwargs = dict(device_kwargs)
+    signal = device_kwargs.pop('signal', None)
+    mic = FakeDevice("Sim Mic", make_voice_signal() if signal is None else signal, seed=7, **device_kwargs)
+    music = FakeDevice("Sim Music", make_music_signal(), start_offset_ms=3.0, seed=11)
+    # Already capturing when opened: stands in for the warm-up that start_stream()
+    # does on the executor thread while the player keeps pulling frames
+    mic2 = FakeDevice("Sim Mic 2", make_voice_signal(seed=3) // 2, start_offset_ms=-100.0, seed=5)
+
+    FakePyAudio.devices = [mic, music, mic2]
+    FakePyAudio.clock = clock
+    with mock.patch.object(pyaudio, "PyAudio", FakePyAudio), mock.patch.object(audio, "time", clock):
+        handler = audio.AudioHandler()
+        try:
+            handler.start_stream()
+            events = settings(handler) if settings else None
+            player = SimPlayer(handler, clock, cpu_scale=cpu_scale, events=events)
+            output = player.run(int(seconds / FRAME_SECONDS))
+            stream = handler.stream
+            device_name = stream.device.name if stream is not None and stream.is_active() else None
+        finally:
+            handler.close()
+            handler.executor.shutdown(wait=True)
+
+    lat = np.array(player.latencies) * 1000.0 if player.latencies else np.zeros(1)
+    cpu = np.array(player.read_cpu) * 1e6
+    return {
+        'name': name,
+        'golden': golden,
+        'checks': dict(DEFAULT_CHECKS, **checks),
+        'output': output,
+        'frames': len(player.frames),
+        'latency_ms': (lat.mean(), np.percentile(lat, 95), lat.max()),
+        'late_frames': player.late_frames,
+        'silent_frames': player.silent_frames,
+        'overflows': mic.overflows,
+        'read_us': (cpu.mean(), np.percentile(cpu, 99)),
+        'quality': (handler.quality, len(handler.governor.transitions)),
+        'device': device_name,
+        'max_step': int(np.abs(np.diff(output.reshape(-1, CHANNELS).astype(np.int32), axis=0)).max()),
+    }
+
+
+def golden_path(name):
+    return os.path.join(GOLDEN_DIR, f"{name}.npz")
+
+
+def compare_golden(result, atol=2):
+    """Max abs difference (LSB) and SNR against the golden render; atol LSB allowed."""
+    data = np.load(golden_path(result['golden']))['output']
+    out = result['output']
+    if out.shape != data.shape:
+        return False, f"length {out.shape} != golden {data.shape}"
+    diff = out.astype(np.int32) - data.astype(np.int32)
+    max_diff = int(np.abs(diff).max())
+    noise = float(np.mean(diff.astype(np.float64) ** 2))
+    signal = float(np.mean(data.astype(np.float64) ** 2))
+    snr = float('inf') if noise == 0 else 10 * np.log10(signal / noise)
+    return max_diff <= atol, f"max diff {max_diff} LSB, SNR {snr:.1f} dB"
+
+
+def check_result(result):
+    """List of failed checks (empty = pass); the golden is compared separately."""
+    checks = result['checks']
+    measured = {
+        'max_late': result['late_frames'],
+        'max_overflows': result['overflows'],
+        'max_silent': result['silent_frames'],
+        'max_latency_ms': result['latency_ms'][2],
+        'max_step': result['max_step'],
+    }
+    failures = []
+    for key, value in measured.items():
+        limit = checks[key]
+        if limit is not None and value > limit:
+            failures.append(f"{key[4:]} {value:g} > {limit:g}")
+    if checks['quality'] is not None and result['quality'][0] != checks['quality']:
+        failures.append(f"quality {result['quality'][0]} != {checks['quality']}")
+    if checks['device'] is not None and result['device'] != checks['device']:
+        failures.append(f"device {result['device']!r} != {checks['device']!r}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', help=f"subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--seconds', type=float, default=1.0)
+    parser.add_argument('--cpu-scale', type=float, default=1.0,
+                        help="multiply measured DSP time (emulate a slower machine)")
+    parser.add_argument('--update-golden', action='store_true')
+    args = parser.parse_args(argv)
+
+    failed = False
+    for name in args.scenarios or SCENARIOS:
+        r = run_scenario(name, seconds=args.seconds, cpu_scale=args.cpu_scale)
+        mean, p95, worst = r['latency_ms']
+        line = (f"{name:<13} frames {r['frames']:4d}  latency {mean:5.1f}/{p95:5.1f}/{worst:5.1f} ms "
+                f"(mean/p95/max)  late {r['late_frames']:3d}  overflows {r['overflows']}  "
+                f"silent {r['silent_frames']}  read {r['read_us'][0]:6.0f} us  "
+                f"quality {r['quality'][0]} ({r['quality'][1]} changes)")
+
+        if r['golden'] is not None:
+            if args.update_golden and r['golden'] == name:
+                os.makedirs(GOLDEN_DIR, exist_ok=True)
+                np.savez_compressed(golden_path(name), output=r['output'])
+                line += "  golden updated"
+            elif os.path.exists(golden_path(r['golden'])):
+                ok, detail = compare_golden(r, atol=r['checks']['atol'])
+                failed |= not ok
+                line += f"  golden {'ok' if ok else 'FAIL'} ({detail})"
+            else:
+                failed = True
+                line += "  golden missing"
+        failures = check_result(r)
+        if failures:
+            failed = True
+            line += f"  FAIL ({', '.join(failures)})"
+        print(line)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+import numpy as np
+from dsp import DSPChain
+
+
+def tone_db(out, freq, rate=48000):
+    left = out.reshape(-1, 2)[:, 0]
+    spectrum = np.abs(np.fft.rfft(left * np.hanning(len(left))))
+    return 20 * np.log10(spectrum[int(round(freq * len(left) / rate))])
+
+
+def test_mono_variant_keeps_the_eq_response():
+    t = np.arange(960) / 48000
+    for freq in (250.0, 6000.0, 12000.0):
+        mono = 8000 * np.sin(2 * np.pi * freq * t)
+        frame = np.repeat(mono, 2).astype(np.float32)
+        chain = DSPChain(pitch_factor=0.8, eq_db=(0, 0, -20))
+        stereo = tone_db(chain.variant(2).process(frame), freq * 0.8)
+        downmix = tone_db(chain.variant(3).process(frame), freq * 0.8)
+        assert abs(stereo - downmix) < 0.01
@@ -0,0 +1,37 @@
+import numpy as np
+from effects import Chorus, Vibrato
+
+
+def sine_blocks(n_blocks, freq=200.0, chunk=960):
+    t = np.arange(n_blocks * chunk) / 48000
+    mono = 8000 * np.sin(2 * np.pi * freq * t)
+    return np.stack([mono, mono], axis=1).astype(np.float32).reshape(n_blocks, chunk, 2)
+
+
+def max_step(out):
+    return np.abs(np.diff(out[:, 0])).max()
+
+
+def test_switching_off_and_on_fades():
+    blocks = sine_blocks(6)
+    natural = max_step(blocks.reshape(-1, 2))
+    for cls in (Vibrato, Chorus):
+        fx = cls()
+        fx.enabled = True
+        fx.settle()
+        out = []
+        for i, block in enumerate(blocks):
+            if i == 2:
+                fx.enabled = False
+            if i == 4:
+                fx.enabled = True
+            out.append(fx.run(block))
+        assert max_step(np.concatenate(out)) < 1.5 * natural
+
+
+def test_history_is_fed_while_off():
+    blocks = sine_blocks(3)
+    fx, reference = Vibrato(), Vibrato()
+    fx.run(blocks[0])
+    reference.process(blocks[0])
+    np.testing.assert_array_equal(fx.delay_line.history, reference.delay_line.history)
@@ -0,0 +1,32 @@
+from governor import QualityGovernor
+
+OVER = 0.050
+CALM = 0.001
+
+
+def run(gov, elapsed, frames):
+    for _ in range(frames):
+        gov.record(elapsed)
+    return gov.level
+
+
+def test_steps_down_and_back_up():
+    gov = QualityGovernor(budget_ms=10.0)
+    assert run(gov, OVER, 3) == 1
+    assert run(gov, CALM, gov.recover_frames) == 0
+    assert [t[1:3] for t in gov.transitions] == [(0, 1), (1, 0)]
+
+
+def test_recovery_wait_doubles_only_when_a_step_up_does_not_hold():
+    gov = QualityGovernor(budget_ms=10.0)
+    base = gov.recover_frames
+    run(gov, OVER, 3)
+    run(gov, CALM, base)              # step up
+    run(gov, OVER, 3)                 # immediately overloaded again
+    assert gov.level == 1 and gov.recover_frames == 2 * base
+
+    run(gov, CALM, 2 * base)          # step up, then it holds
+    run(gov, CALM, 100000)
+    assert gov.level == 0 and gov.recover_frames == base
+    run(gov, OVER, 3)
+    assert gov.level == 1 and gov.recover_frames == base
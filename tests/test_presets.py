@@ -0,0 +1,26 @@
+from presets import PresetStore
+
+
+def test_deleted_builtin_stays_deleted(tmp_path):
+    path = str(tmp_path / "presets.json")
+    store = PresetStore(path).load()
+    store.delete('Radio')
+    assert 'Radio' not in PresetStore(path).load().names()
+
+
+def test_saving_a_deleted_builtin_name_restores_it(tmp_path):
+    path = str(tmp_path / "presets.json")
+    store = PresetStore(path).load()
+    store.delete('Radio')
+    store.put('Radio', store.get('Default'))
+    reloaded = PresetStore(path).load()
+    assert 'Radio' in reloaded.names()
+    assert reloaded.get('Radio') == store.get('Default')
+
+
+def test_preset_with_wrong_eq_band_count_is_skipped(tmp_path):
+    path = tmp_path / "presets.json"
+    path.write_text('{"version": 1, "presets": {"Two Band": {"eq": [3, -3]}, "Ok": {"eq": [1, 2, 3]}}}')
+    store = PresetStore(str(path)).load()
+    assert 'Two Band' not in store.names()
+    assert store.get('Ok')['eq'] == [1.0, 2.0, 3.0]
@@ -0,0 +1,37 @@
+import os
+import pytest
+from unittest import mock
+import sim
+
+
+@pytest.mark.parametrize("name", list(sim.SCENARIOS))
+def test_scenario(name):
+    result = sim.run_scenario(name)
+    assert result['frames'] == int(1.0 / sim.FRAME_SECONDS)
+    assert sim.check_result(result) == []
+
+    if result['golden'] is not None:
+        assert os.path.exists(sim.golden_path(result['golden']))
+        ok, detail = sim.compare_golden(result, atol=result['checks']['atol'])
+        assert ok, detail
+
+
+def test_pending_preset_effects_survive_setters():
+    clock = sim.SimClock()
+    sim.FakePyAudio.devices = [sim.FakeDevice("Sim Mic", sim.make_voice_signal())]
+    sim.FakePyAudio.clock = clock
+    with mock.patch.object(sim.pyaudio, "PyAudio", sim.FakePyAudio), mock.patch.object(sim.audio, "time", clock):
+        h = sim.audio.AudioHandler()
+        try:
+            h.start_stream()
+            h.apply_chain(sim.compile_settings(sim.BUILTIN_PRESETS['Wobble']))
+            h.set_gain(2.0)
+            # Not rendered yet: reported as pending, and kept by the new chain
+            assert h.get_settings()['modulation']['vibrato']['enabled']
+            sim.SimPlayer(h, clock).run(2)
+            assert h.vibrato.enabled and h.tremolo.enabled
+            assert h.pending_modulation is None
+            assert h.get_settings()['modulation']['vibrato']['rate'] == 6.0
+        finally:
+            h.close()
+            h.executor.shutdown(wait=True)